@@ -0,0 +1,45 @@
+"""Measure the import time of the nbstore modules.
+
+Each module is imported in a fresh interpreter with `-X importtime`, and
+the best cumulative time of several runs is compared with a budget. The
+exit status is non-zero if a module exceeds the budget.
+
+Usage:
+    python benchmarks/importtime.py [BUDGET_MS]
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+
+MODULES = ["nbstore", "nbstore.markdown", "nbstore.store", "nbstore.formatter"]
+
+
+def importtime(module: str) -> int:
+    args = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    result = subprocess.run(args, capture_output=True, text=True, check=True)  # noqa: S603
+    for line in result.stderr.splitlines():
+        _, cumulative, name = line.split("|")
+        if name.strip() == module and cumulative.strip().isdigit():
+            return int(cumulative)
+
+    msg = f"import time of {module} not found"
+    raise RuntimeError(msg)
+
+
+def main() -> None:
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 250
+    failed = False
+
+    print(f"{'module':<20} {'time':>10}")
+    for module in MODULES:
+        ms = min(importtime(module) for _ in range(5)) / 1000
+        failed |= ms > budget
+        print(f"{module:<20} {ms:>8.1f}ms{' over budget' if ms > budget else ''}")
+
+    sys.exit(failed)
+
+
+if __name__ == "__main__":
+    main()
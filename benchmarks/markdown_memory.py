@@ -0,0 +1,68 @@
+"""Measure the memory of Markdown elements with and without slots.
+
+The elements are parsed from the Markdown pages of this repository, and
+each one is copied into an equivalent dataclass without slots. The
+attribute values are shared, so the difference is the per-instance
+overhead only.
+
+Usage:
+    python benchmarks/markdown_memory.py [COPIES]
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from nbstore.markdown import CodeBlock, Image, parse
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+ROOT = Path(__file__).parent.parent
+
+
+def load_elements() -> list[CodeBlock | Image]:
+    paths = [ROOT / "README.md", *sorted((ROOT / "docs").glob("**/*.md"))]
+    text = "\n".join(path.read_text(encoding="utf-8") for path in paths)
+    return [x for x in parse(text) if not isinstance(x, str)]
+
+
+def unslotted(cls: type) -> type:
+    fields = [(f.name, f.type, f) for f in dataclasses.fields(cls)]
+    return dataclasses.make_dataclass(f"Plain{cls.__name__}", fields)
+
+
+def measure(func: Callable[[], list[object]]) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = func()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objects
+    return size
+
+
+def main() -> None:
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    elements = load_elements() * copies
+    plains = {cls: unslotted(cls) for cls in (CodeBlock, Image)}
+
+    def copy(x: CodeBlock | Image, cls: type) -> object:
+        return cls(**{f.name: getattr(x, f.name) for f in dataclasses.fields(x)})
+
+    slotted = measure(lambda: [copy(x, type(x)) for x in elements])
+    plain = measure(lambda: [copy(x, plains[type(x)]) for x in elements])
+
+    n = len(elements)
+    print(f"elements: {n}")
+    print(f"plain:    {plain / n:>6.1f} bytes/element")
+    print(f"slotted:  {slotted / n:>6.1f} bytes/element")
+    print(f"saving:   {(plain - slotted) / n:>6.1f} bytes/element")
+
+
+if __name__ == "__main__":
+    main()
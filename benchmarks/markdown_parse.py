@@ -0,0 +1,53 @@
+"""Benchmark the single-pass Markdown lexer against the nested scan.
+
+The documents are built from the Markdown pages of this repository,
+repeated until they reach the requested size.
+
+Usage:
+    python benchmarks/markdown_parse.py [SIZE_KB ...]
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from nbstore.markdown import _parse_nested, parse
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+ROOT = Path(__file__).parent.parent
+
+
+def load_pages() -> str:
+    paths = [ROOT / "README.md", *sorted((ROOT / "docs").glob("**/*.md"))]
+    return "\n".join(path.read_text(encoding="utf-8") for path in paths)
+
+
+def make_document(pages: str, size: int) -> str:
+    return (pages * (size // len(pages) + 1))[:size]
+
+
+def best(func: Callable[[], object], repeat: int = 5) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main() -> None:
+    sizes = [int(x) for x in sys.argv[1:]] or [100, 1000, 5000]
+    pages = load_pages()
+
+    print(f"{'size':>8} {'nested':>10} {'lexer':>10} {'speedup':>8}")
+    for size in sizes:
+        text = make_document(pages, size * 1024)
+        assert list(parse(text)) == list(_parse_nested(text))
+        nested = best(lambda: list(_parse_nested(text)))  # noqa: B023
+        lexer = best(lambda: list(parse(text)))  # noqa: B023
+        ms = f"{nested * 1e3:>8.1f}ms {lexer * 1e3:>8.1f}ms"
+        print(f"{size:>6}KB {ms} {nested / lexer:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
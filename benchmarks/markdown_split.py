@@ -0,0 +1,92 @@
+"""Benchmark the attribute tokenizer against the character-by-character scan.
+
+The attribute strings are typical of code blocks and images in
+documentation pages: classes, identifiers, quoted values, and escapes.
+
+Usage:
+    python benchmarks/markdown_split.py [NUMBER]
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from typing import TYPE_CHECKING
+
+from nbstore.markdown import split
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+ATTRIBUTES = [
+    ".python #fig",
+    "python .md #plot-1",
+    "#fig width=100 .center",
+    ".python #fig source=1 title='My Figure'",
+    '#image-1 alt="a b c" width = 50%',
+    "`plot(1)` .python #fig",
+    r"#fig title='it\'s a \"test\"' .left",
+    "{#fig .python exec=1 hide}",
+]
+
+
+def _split_reference(text: str) -> Iterator[str]:
+    in_quotes = {'"': False, "'": False, "`": False}
+
+    chars = list(text)
+    start = 0
+
+    for cursor, char in enumerate(chars):
+        if cursor > 0 and chars[cursor - 1] == "\\":
+            continue
+
+        for q, in_ in in_quotes.items():
+            if char == q:
+                if in_:
+                    yield text[start : cursor + 1]
+                    start = cursor + 1
+                in_quotes[q] = not in_
+
+        if char == " ":
+            if not any(in_quotes.values()):
+                if start < cursor:
+                    yield text[start:cursor]
+                start = cursor + 1
+
+    if start < len(text):
+        yield text[start:]
+
+
+def split_reference(text: str) -> Iterator[str]:
+    parts = list(_split_reference(text))
+
+    start = 0
+    for cursor, part in enumerate(parts):
+        if part == "=" and 0 < cursor < len(parts) - 1:
+            if start < cursor - 1:
+                yield from parts[start : cursor - 1]
+            yield f"{parts[cursor - 1]}={parts[cursor + 1]}"
+            start = cursor + 2
+
+    if start < len(parts):
+        yield from parts[start:]
+
+
+def best(func: Callable[[], object], number: int, repeat: int = 5) -> float:
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main() -> None:
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    print(f"{'attributes':<42} {'reference':>10} {'split':>10} {'speedup':>8}")
+    for text in ATTRIBUTES:
+        assert list(split(text)) == list(split_reference(text))
+        reference = best(lambda: list(split_reference(text)), number)  # noqa: B023
+        current = best(lambda: list(split(text)), number)  # noqa: B023
+        us = f"{reference * 1e6:>8.2f}us {current * 1e6:>8.2f}us"
+        print(f"{text:<42} {us} {reference / current:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
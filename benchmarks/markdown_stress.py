@@ -0,0 +1,57 @@
+"""Stress the Markdown parser with pathological documents.
+
+Each document defeats a lazy regex by leaving an element unclosed many
+times, so that the nested scan is quadratic in the size of the document,
+while the lexer should stay linear.
+
+Usage:
+    python benchmarks/markdown_stress.py [SIZE_KB ...]
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from typing import TYPE_CHECKING
+
+from nbstore.markdown import _parse_nested, parse
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+DOCUMENTS: dict[str, Callable[[int], str]] = {
+    "unclosed fences": lambda n: "".join(f"{' ' * k}```\nx\n" for k in range(n)),
+    "long fence": lambda n: f"{'`' * n}\n{'x' * n}\n```\n",
+    "unclosed images": lambda n: "![alt\n" * n,
+    "images without braces": lambda n: "![alt](url)\n" * n,
+    "unclosed comments": lambda n: "<!-- x\n" * n,
+}
+
+
+def make_document(make: Callable[[int], str], size: int) -> str:
+    n = 1
+    while len(text := make(n)) < size:
+        n += max(n // 8, 1)
+    return text
+
+
+def best(func: Callable[[], object], repeat: int = 3) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main() -> None:
+    sizes = [int(x) for x in sys.argv[1:]] or [1, 2, 4]
+
+    print(f"{'document':<22} {'size':>6} {'nested':>10} {'lexer':>10}")
+    for name, make in DOCUMENTS.items():
+        for size in sizes:
+            text = make_document(make, size * 1024)
+            assert list(parse(text)) == list(_parse_nested(text))
+            nested = best(lambda: list(_parse_nested(text)))  # noqa: B023
+            lexer = best(lambda: list(parse(text)))  # noqa: B023
+            ms = f"{nested * 1e3:>8.1f}ms {lexer * 1e3:>8.1f}ms"
+            print(f"{name:<22} {size:>4}KB {ms}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,35 @@ Main components:
 - Content parsing for Python and Markdown files
 """
 
-from .formatter import set_formatter
-from .store import Store, read
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .formatter import set_formatter
+    from .store import Store, read
 
 __all__ = ["Store", "read", "set_formatter"]
+
+# Public names are imported on first access, so that importing nbstore does
+# not pull in nbformat or the plotting libraries.
+MODULES: dict[str, str] = {
+    "Store": "store",
+    "read": "store",
+    "set_formatter": "formatter",
+}
+
+
+def __getattr__(name: str) -> object:
+    if module := MODULES.get(name):
+        value = getattr(importlib.import_module(f".{module}", __name__), name)
+        globals()[name] = value
+        return value
+
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,141 @@
+"""Bounded caches for parsed content.
+
+This module provides a small least-recently-used cache with a configurable
+size and hit/miss statistics, used to keep memory flat when the same
+sources are parsed repeatedly, for example by a live-reload server.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Generic, NamedTuple, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of a cache.
+
+    Attributes:
+        hits (int): The number of lookups that found a value.
+        misses (int): The number of lookups that found no value.
+        maxsize (int): The maximum number of entries.
+        currsize (int): The current number of entries.
+    """
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class LRUCache(Generic[K, V]):
+    """A least-recently-used cache with a bounded number of entries.
+
+    The cache can be shared between threads, such as the background writer
+    of `nbstore.store.Store`.
+
+    Attributes:
+        maxsize (int): The maximum number of entries. When exceeded, the least
+            recently used entries are discarded.
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        self.maxsize: int = maxsize
+        self._data: OrderedDict[K, V] = OrderedDict()
+        self._hits: int = 0
+        self._misses: int = 0
+        self._lock: threading.RLock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def get(self, key: K) -> V | None:
+        """Get a value and mark it as recently used.
+
+        Args:
+            key (K): The key to look up.
+
+        Returns:
+            V | None: The cached value, or None if not found.
+        """
+        with self._lock:
+            if key in self._data:
+                self._hits += 1
+                self._data.move_to_end(key)
+                return self._data[key]
+
+            self._misses += 1
+            return None
+
+    def set(self, key: K, value: V) -> None:
+        """Set a value, discarding the least recently used entries if full.
+
+        Args:
+            key (K): The key of the value.
+            value (V): The value to cache.
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self.resize(self.maxsize)
+
+    def pop(self, key: K) -> V | None:
+        """Remove a value.
+
+        Args:
+            key (K): The key of the value.
+
+        Returns:
+            V | None: The removed value, or None if not found.
+        """
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def resize(self, maxsize: int) -> None:
+        """Change the maximum number of entries.
+
+        Args:
+            maxsize (int): The new maximum number of entries.
+        """
+        with self._lock:
+            self.maxsize = maxsize
+
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        with self._lock:
+            self._data.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def info(self) -> CacheInfo:
+        """Get the statistics of the cache.
+
+        Returns:
+            CacheInfo: The statistics of the cache.
+        """
+        return CacheInfo(self._hits, self._misses, self.maxsize, len(self._data))
+
+
+def digest(text: str) -> bytes:
+    """Get a digest of a text to be used as a cache key.
+
+    Keying a cache by digest rather than by the text itself means that the
+    cache does not hold on to the text after its entry has been discarded.
+
+    Args:
+        text (str): The text to digest.
+
+    Returns:
+        bytes: The digest of the text.
+    """
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
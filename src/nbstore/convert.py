@@ -0,0 +1,324 @@
+"""Convert figure outputs to PNG in the background.
+
+This module provides functions for converting the PDF, SVG, and raster
+outputs of notebook cells, as returned by `nbstore.notebook.get_mime_content`,
+to PNG images of a target width. Many outputs can be converted concurrently
+in a pool of processes, and the results are cached on disk by content hash
+and target width.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+import io
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+    from types import TracebackType
+    from typing import Self
+
+    from PIL.Image import Image
+
+# pyright: reportMissingTypeStubs=false
+# pyright: reportUnknownArgumentType=false
+# pyright: reportUnknownMemberType=false
+# pyright: reportUnknownVariableType=false
+
+
+def svg_to_png(data: bytes, width: int | None) -> bytes:
+    """Convert SVG content to PNG with cairosvg.
+
+    Args:
+        data (bytes): The SVG content.
+        width (int | None): The width in pixels, or None to keep the size
+            of the SVG.
+
+    Returns:
+        bytes: The PNG content.
+    """
+    import cairosvg
+
+    return cairosvg.svg2png(bytestring=data, output_width=width)  # pyright: ignore[reportReturnType]
+
+
+def pdf_to_png(data: bytes, width: int | None) -> bytes:
+    """Convert the first page of PDF content to PNG with pypdfium2.
+
+    Args:
+        data (bytes): The PDF content.
+        width (int | None): The width in pixels, or None to render the page
+            at 72 dpi.
+
+    Returns:
+        bytes: The PNG content.
+    """
+    import pypdfium2  # pyright: ignore[reportMissingImports]
+
+    pdf = pypdfium2.PdfDocument(data)
+
+    try:
+        page = pdf[0]
+        scale = width / page.get_width() if width else 1
+        return _to_png(page.render(scale=scale).to_pil())
+    finally:
+        pdf.close()
+
+
+def image_to_png(data: bytes, width: int | None) -> bytes:
+    """Convert raster image content to PNG with Pillow.
+
+    Args:
+        data (bytes): The image content.
+        width (int | None): The width in pixels, or None to keep the size
+            of the image.
+
+    Returns:
+        bytes: The PNG content.
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        if width and width != image.width:
+            height = max(round(image.height * width / image.width), 1)
+            return _to_png(image.resize((width, height), Image.Resampling.LANCZOS))
+
+        return _to_png(image)
+
+
+def _to_png(image: Image) -> bytes:
+    with io.BytesIO() as fp:
+        image.save(fp, format="PNG")
+        return fp.getvalue()
+
+
+BACKENDS: dict[str, tuple[str, Callable[[bytes, int | None], bytes]]] = {
+    "image/svg+xml": ("cairosvg", svg_to_png),
+    "application/pdf": ("pypdfium2", pdf_to_png),
+    "image/png": ("PIL", image_to_png),
+    "image/jpeg": ("PIL", image_to_png),
+    "image/webp": ("PIL", image_to_png),
+}
+"""The module and function used to convert each MIME type to PNG."""
+
+
+@cache
+def is_available(mime: str) -> bool:
+    """Check whether content of a MIME type can be converted.
+
+    Args:
+        mime (str): The MIME type.
+
+    Returns:
+        bool: True if the backend for the MIME type can be imported.
+    """
+    if not (backend := BACKENDS.get(mime)):
+        return False
+
+    try:
+        importlib.import_module(backend[0])
+    except (ImportError, OSError):  # cairosvg raises OSError without libcairo
+        return False
+
+    return True
+
+
+def get_key(data: bytes, mime: str, width: int | None) -> str:
+    """Get the cache key of a conversion.
+
+    Args:
+        data (bytes): The content to convert.
+        mime (str): The MIME type of the content.
+        width (int | None): The target width in pixels.
+
+    Returns:
+        str: The cache key as a hex string.
+    """
+    h = hashlib.blake2b(f"{mime}:{width}:".encode(), digest_size=16)
+    h.update(data)
+    return h.hexdigest()
+
+
+def convert(
+    data: str | bytes,
+    mime: str,
+    width: int | None = None,
+    directory: str | Path | None = None,
+) -> bytes:
+    """Convert content to PNG in the current process.
+
+    Args:
+        data (str | bytes): The content to convert.
+        mime (str): The MIME type of the content.
+        width (int | None): The target width in pixels, or None to keep the
+            natural size.
+        directory (str | Path | None): The directory of the cache, or None
+            to disable the cache.
+
+    Returns:
+        bytes: The PNG content.
+
+    Raises:
+        NotImplementedError: If the MIME type cannot be converted.
+    """
+    data = _prepare(data, mime)
+
+    if directory is None:
+        return _convert(data, mime, width, None)
+
+    path = Path(directory) / f"{get_key(data, mime, width)}.png"
+    if path.exists():
+        return path.read_bytes()
+
+    return _convert(data, mime, width, path)
+
+
+def _prepare(data: str | bytes, mime: str) -> bytes:
+    if not is_available(mime):
+        msg = f"cannot convert {mime!r} to PNG"
+        raise NotImplementedError(msg)
+
+    return data.encode() if isinstance(data, str) else data
+
+
+def _convert(data: bytes, mime: str, width: int | None, path: Path | None) -> bytes:
+    """Convert content to PNG and write it to the cache.
+
+    This function runs in the worker processes of `Converter`.
+
+    Args:
+        data (bytes): The content to convert.
+        mime (str): The MIME type of the content.
+        width (int | None): The target width in pixels.
+        path (Path | None): The path of the cache file, or None.
+
+    Returns:
+        bytes: The PNG content.
+    """
+    png = BACKENDS[mime][1](data, width)
+
+    if path:
+        from nbstore.store import write_bytes
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_bytes(path, png)
+
+    return png
+
+
+class Converter:
+    """Convert content to PNG concurrently in a pool of processes.
+
+    Conversions whose result is in the cache complete immediately, and a
+    conversion submitted again while in progress shares its future. The
+    pool is started on the first conversion that needs it.
+
+    Attributes:
+        directory (Path | None): The directory of the cache, or None if the
+            cache is disabled.
+        max_workers (int | None): The maximum number of worker processes,
+            or None for the number of processors.
+    """
+
+    directory: Path | None
+    max_workers: int | None
+    _executor: ProcessPoolExecutor | None
+    _futures: dict[str, Future[bytes]]
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        max_workers: int | None = None,
+    ) -> None:
+        self.directory = Path(directory) if directory is not None else None
+        self.max_workers = max_workers
+        self._executor = None
+        self._futures = {}
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.shutdown()
+
+    def submit(
+        self,
+        data: str | bytes,
+        mime: str,
+        width: int | None = None,
+    ) -> Future[bytes]:
+        """Submit content to be converted to PNG.
+
+        Args:
+            data (str | bytes): The content to convert.
+            mime (str): The MIME type of the content.
+            width (int | None): The target width in pixels, or None to keep
+                the natural size.
+
+        Returns:
+            Future[bytes]: The future of the PNG content.
+
+        Raises:
+            NotImplementedError: If the MIME type cannot be converted.
+        """
+        data = _prepare(data, mime)
+        key = get_key(data, mime, width)
+
+        if future := self._futures.get(key):
+            return future
+
+        path = self.directory / f"{key}.png" if self.directory else None
+
+        if path and path.exists():
+            future = Future()
+            future.set_result(path.read_bytes())
+            return future
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.max_workers)
+
+        future = self._executor.submit(_convert, data, mime, width, path)
+        self._futures[key] = future
+        future.add_done_callback(lambda _: self._futures.pop(key, None))
+        return future
+
+    def submit_many(
+        self,
+        items: Iterable[tuple[str, str | bytes]],
+        width: int | None = None,
+    ) -> list[Future[bytes]]:
+        """Submit a batch of contents to be converted to PNG.
+
+        Args:
+            items (Iterable[tuple[str, str | bytes]]): Pairs of a MIME type
+                and content, such as the results of `get_mime_content`.
+            width (int | None): The target width in pixels, or None to keep
+                the natural size.
+
+        Returns:
+            list[Future[bytes]]: The futures of the PNG contents, in the
+            order of the items.
+
+        Raises:
+            NotImplementedError: If a MIME type cannot be converted.
+        """
+        return [self.submit(data, mime, width) for mime, data in items]
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        """Shut down the pool of processes.
+
+        Args:
+            wait (bool): Whether to wait for pending conversions to finish.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
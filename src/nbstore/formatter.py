@@ -2,24 +2,34 @@
 
 This module provides functions for converting visualization outputs from
 various libraries (matplotlib, seaborn, holoviews) to different formats
-(PGF, PDF, SVG), and utilities for registering these formatters with IPython.
+(PGF, PDF, SVG, PNG, WebP), and utilities for registering these formatters
+with IPython.
 """
 
 from __future__ import annotations
 
+import atexit
 import base64
+import hashlib
 import io
+import itertools
+import re
+import shutil
 import tempfile
-import uuid
+from dataclasses import dataclass, field
+from functools import cache, partial
 from pathlib import Path
 from typing import TYPE_CHECKING
+from weakref import WeakKeyDictionary
 
 if TYPE_CHECKING:
-    from collections.abc import Callable
+    from collections.abc import Callable, Iterable, Sequence
 
     from IPython.core.interactiveshell import InteractiveShell
     from IPython.lib.pretty import RepresentationPrinter
     from matplotlib.figure import Figure
+    from matplotlib.transforms import Bbox
+    from seaborn._core.plot import Plotter
     from seaborn.objects import Plot
 
 # pyright: reportAttributeAccessIssue=false
@@ -33,34 +43,257 @@ if TYPE_CHECKING:
 # pyright: reportUnusedParameter=false
 
 
+COUNTER = itertools.count()
+"""The counter for unique names of PGF files in the scratch directory."""
+
+
+@cache
+def get_scratch_directory() -> Path:
+    """Get the scratch directory shared by all figures of the session.
+
+    The directory is created on first use and removed at interpreter exit.
+
+    Returns:
+        Path: The scratch directory.
+    """
+    dirname = tempfile.mkdtemp(prefix="nbstore-")
+    atexit.register(shutil.rmtree, dirname, ignore_errors=True)
+    return Path(dirname)
+
+
+@dataclass
+class RenderCache:
+    """A cache of rendered figures stored on disk.
+
+    Attributes:
+        directory (Path | None): The directory to store rendered figures in,
+            or None if the cache is disabled.
+    """
+
+    directory: Path | None = None
+
+    def get(self, key: str) -> bytes | None:
+        """Get a rendered figure.
+
+        Args:
+            key (str): The key of the rendered figure.
+
+        Returns:
+            bytes | None: The rendered figure, or None if not found.
+        """
+        if self.directory is None:
+            return None
+
+        path = self.directory / key
+        return path.read_bytes() if path.exists() else None
+
+    def set(self, key: str, data: bytes) -> None:
+        """Store a rendered figure.
+
+        The figure is written to a temporary file first and then renamed, so
+        that a concurrent reader never sees a partial file.
+
+        Args:
+            key (str): The key of the rendered figure.
+            data (bytes): The rendered figure.
+        """
+        from nbstore.store import write_bytes
+
+        if self.directory is not None:
+            write_bytes(self.directory / key, data)
+
+
+RENDER_CACHE = RenderCache()
+"""The render cache shared by all formatters."""
+
+
+def set_render_cache(directory: str | Path | None) -> None:
+    """Enable or disable the render cache.
+
+    When enabled, rendered figures are stored in the directory keyed by a
+    fingerprint of the figure and the format, so that unchanged figures are
+    not rendered again when a notebook is re-executed.
+
+    Args:
+        directory (str | Path | None): The directory to store rendered
+            figures in, or None to disable the cache.
+    """
+    if directory is None:
+        RENDER_CACHE.directory = None
+        return
+
+    RENDER_CACHE.directory = Path(directory)
+    RENDER_CACHE.directory.mkdir(parents=True, exist_ok=True)
+
+
+METADATA: dict[str, dict[str, str | None]] = {"pdf": {}, "svg": {}}
+"""The metadata passed to `savefig` for each format."""
+
+DETERMINISTIC_METADATA: dict[str, dict[str, str | None]] = {
+    "pdf": {"CreationDate": None},
+    "svg": {"Date": None},
+}
+"""The metadata that removes timestamps from the output of each format."""
+
+
+@dataclass
+class DeterministicState:
+    """The settings replaced by the deterministic mode.
+
+    Attributes:
+        enabled (bool): Whether the deterministic mode is enabled.
+        hashsalt (str | None): The previous salt of SVG element ids.
+        metadata (dict[str, dict[str, str | None]]): The previous metadata
+            replaced in each format.
+    """
+
+    enabled: bool = False
+    hashsalt: str | None = None
+    metadata: dict[str, dict[str, str | None]] = field(default_factory=dict)
+
+
+DETERMINISTIC = DeterministicState()
+"""The settings to restore when the deterministic mode is disabled."""
+
+
+def set_deterministic(deterministic: bool = True) -> None:
+    """Make identical figures render to identical bytes.
+
+    Removes the creation dates from PDF and SVG output and pins the salt
+    matplotlib uses to generate the element ids of SVG output. PGF output
+    is deterministic already, since raster images are embedded by content.
+    Disabling the deterministic mode restores the settings it replaced.
+
+    Args:
+        deterministic (bool): Whether to enable the deterministic mode.
+    """
+    import matplotlib as mpl
+
+    state = DETERMINISTIC
+
+    if deterministic and not state.enabled:
+        state.hashsalt = mpl.rcParams["svg.hashsalt"]
+        state.metadata = {
+            fmt: {k: METADATA[fmt][k] for k in metadata if k in METADATA[fmt]}
+            for fmt, metadata in DETERMINISTIC_METADATA.items()
+        }
+
+    if deterministic:
+        for fmt, metadata in DETERMINISTIC_METADATA.items():
+            METADATA[fmt].update(metadata)
+        mpl.rcParams["svg.hashsalt"] = "nbstore"
+
+    elif state.enabled:
+        for fmt, metadata in DETERMINISTIC_METADATA.items():
+            for key in metadata:
+                METADATA[fmt].pop(key, None)
+            METADATA[fmt].update(state.metadata.get(fmt, {}))
+        mpl.rcParams["svg.hashsalt"] = state.hashsalt
+
+    state.enabled = deterministic
+
+
+def fingerprint(fig: Figure, fmt: str, bbox_inches: Bbox | str = "tight") -> str:
+    """Get a fingerprint of a matplotlib figure rendered in a format.
+
+    The figure is drawn with `nbstore.renderer.HashRenderer`, which hashes
+    the paths, text, images, and graphics contexts a vector backend would
+    receive instead of rendering them. The hash also covers the tight
+    bounding box, the settings of the format, and the matplotlib version.
+
+    Args:
+        fig (Figure): The matplotlib figure.
+        fmt (str): The format to render the figure in.
+        bbox_inches (Bbox | str): The bounding box the figure is saved with.
+
+    Returns:
+        str: The fingerprint as a hex string.
+    """
+    import matplotlib as mpl
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    from nbstore.renderer import HashRenderer
+
+    prefixes = (f"{fmt}.", "savefig.")
+    params = sorted(
+        (k, repr(v)) for k, v in mpl.rcParams.items() if k.startswith(prefixes)
+    )
+    saved = bbox_inches if isinstance(bbox_inches, str) else bbox_inches.bounds
+    metadata = sorted(METADATA.get(fmt, {}).items())
+    if fmt in {"png", "webp"}:
+        metadata.append(("raster", repr(RASTER)))
+    meta = (fmt, mpl.__version__, fig.dpi, saved, params, metadata)
+
+    h = hashlib.blake2b(repr(meta).encode(), digest_size=16)
+    canvas = fig.canvas
+
+    try:
+        agg = FigureCanvasAgg(fig)
+        width, height = fig.bbox.size
+        fig.draw(HashRenderer(h, width, height, fig.dpi))
+        bbox = fig.get_tightbbox(agg.get_renderer())
+    finally:
+        fig.set_canvas(canvas)
+
+    h.update(repr(bbox.bounds).encode())
+    return h.hexdigest()
+
+
+def _render(fig: Figure, fmt: str, bbox_inches: Bbox | str = "tight") -> bytes:
+    """Render a matplotlib figure, using the render cache if enabled.
+
+    Args:
+        fig (Figure): The matplotlib figure to render.
+        fmt (str): The format to render the figure in.
+        bbox_inches (Bbox | str): The bounding box to save the figure with.
+
+    Returns:
+        bytes: The rendered figure.
+    """
+    render = RENDERERS[fmt]
+
+    if RENDER_CACHE.directory is None:
+        return render(fig, bbox_inches)
+
+    key = f"{fingerprint(fig, fmt, bbox_inches)}.{fmt}"
+    if (data := RENDER_CACHE.get(key)) is None:
+        data = render(fig, bbox_inches)
+        RENDER_CACHE.set(key, data)
+
+    return data
+
+
 def matplotlib_figure_to_pgf(fig: Figure, rp: RepresentationPrinter, cycle) -> None:
     """Convert a matplotlib figure to PGF format.
 
-    Creates a temporary PGF file, reads its content, encodes embedded images
-    as base64, and outputs the result using the representation printer.
+    Writes a PGF file to the scratch directory, reads its content, encodes
+    embedded images as base64, and outputs the result using the
+    representation printer.
 
     Args:
         fig (Figure): The matplotlib figure to convert.
         rp (RepresentationPrinter): The printer to output the result.
         cycle: Object passed by IPython for object representation.
     """
-    name = str(uuid.uuid4())
+    return rp.text(_render(fig, "pgf").decode())
 
-    with tempfile.TemporaryDirectory() as dirname:
-        directory = Path(dirname)
-        filename = f"{name}.pgf"
-        path = directory / filename
-        fig.savefig(path, format="pgf", bbox_inches="tight")
-        text = path.read_text(encoding="utf-8")
 
-        imagenames = [x.name for x in directory.iterdir() if x.name != filename]
-        if not imagenames:
-            return rp.text(text)
+def _figure_to_pgf(fig: Figure, bbox_inches: Bbox | str) -> bytes:
+    directory = get_scratch_directory()
+    path = directory / f"figure-{next(COUNTER)}.pgf"
+    fig.savefig(path, format="pgf", bbox_inches=bbox_inches)
+    text = path.read_text(encoding="utf-8")
+    path.unlink()
 
-        for name in imagenames:
-            text = text.replace(name, _encode_pgf_text(name, directory))
+    # The PGF backend writes raster images next to the PGF file as
+    # `<stem>-img<n>.png` and references them by name.
+    pattern = re.compile(rf"{path.stem}-img\d+\.png")
 
-        return rp.text(text)
+    for name in dict.fromkeys(pattern.findall(text)):
+        text = text.replace(name, _encode_pgf_text(name, directory))
+        (directory / name).unlink()
+
+    return text.encode()
 
 
 def _encode_pgf_text(name: str, directory: Path) -> str:
@@ -88,25 +321,411 @@ def matplotlib_figure_to_pdf(fig: Figure) -> bytes:
     Returns:
         bytes: The PDF content as bytes.
     """
+    return _render(fig, "pdf")
+
+
+def _figure_to_pdf(fig: Figure, bbox_inches: Bbox | str) -> bytes:
     with io.BytesIO() as fp:
-        fig.savefig(fp, format="pdf", bbox_inches="tight")
+        fig.savefig(fp, format="pdf", bbox_inches=bbox_inches, metadata=METADATA["pdf"])
         return fp.getvalue()
 
 
-def matplotlib_figure_to_svg(fig: Figure) -> str:
+def matplotlib_figure_to_svg(fig: Figure) -> str | tuple[str, dict]:
     """Convert a matplotlib figure to SVG format.
 
+    If the SVG minification stage is enabled, the minified content is
+    returned together with its metadata.
+
+    Args:
+        fig (Figure): The matplotlib figure to convert.
+
+    Returns:
+        str | tuple[str, dict]: The SVG content as a string, or the minified
+        content and its metadata.
+    """
+    xml = _render(fig, "svg").decode()
+    return _minify_svg(xml) if SVG_MINIFY.enabled else xml
+
+
+def _figure_to_svg(fig: Figure, bbox_inches: Bbox | str) -> bytes:
+    with io.BytesIO() as fp:
+        fig.savefig(fp, format="svg", bbox_inches=bbox_inches, metadata=METADATA["svg"])
+        return fp.getvalue()
+
+
+@dataclass
+class SVGMinify:
+    """Options of the SVG minification stage.
+
+    Attributes:
+        enabled (bool): Whether SVG output is minified.
+        precision (int): The number of decimal places kept in path data.
+        directory (Path | None): The directory to extract embedded raster
+            images to, or None to keep them embedded.
+        base_url (str | None): The URL the extracted images are referenced
+            under, required with a directory.
+    """
+
+    enabled: bool = False
+    precision: int = 2
+    directory: Path | None = None
+    base_url: str | None = None
+
+
+SVG_MINIFY = SVGMinify()
+"""The options of the SVG minification stage shared by all formatters."""
+
+
+def set_svg_minify(
+    enabled: bool = True,
+    *,
+    precision: int = 2,
+    directory: str | Path | None = None,
+    base_url: str | None = None,
+) -> None:
+    """Enable or disable the SVG minification stage.
+
+    See `minify_svg` for what the stage does. The sizes before and after
+    minification are reported in the output metadata under "minify".
+
+    Args:
+        enabled (bool): Whether SVG output is minified.
+        precision (int): The number of decimal places kept in path data.
+        directory (str | Path | None): The directory to extract embedded
+            raster images to, or None to keep them embedded.
+        base_url (str | None): The URL the extracted images are referenced
+            under, required with a directory. See `minify_svg`.
+
+    Raises:
+        ValueError: If a directory is given without a base URL.
+    """
+    _check_base_url(directory, base_url)
+
+    SVG_MINIFY.enabled = enabled
+    SVG_MINIFY.precision = precision
+    SVG_MINIFY.directory = Path(directory) if directory is not None else None
+    SVG_MINIFY.base_url = base_url
+
+
+COORDINATES_PATTERN = re.compile(r'(?<= [dxy]=")[^"]*')
+NUMBER_PATTERN = re.compile(r"-?\d+\.\d+")
+DEFS_PATTERN = re.compile(r"<defs>.*?</defs>", re.DOTALL)
+DEF_PATTERN = re.compile(r'<(\w+) id="([^"]+)"[^>]*?(?:/>|>.*?</\1>)', re.DOTALL)
+EMPTY_DEFS_PATTERN = re.compile(r"\s*<defs>\s*</defs>")
+REFERENCE_PATTERN = re.compile(r'#([^\s"#();]+)(?=[")])')
+INDENT_PATTERN = re.compile(r"\n[ \t]+<")
+RASTER_PATTERN = re.compile(r'(?<=href=")data:image/(\w+);base64,([^"]*)')
+
+
+def minify_svg(
+    xml: str,
+    precision: int = 2,
+    directory: Path | None = None,
+    base_url: str | None = None,
+) -> str:
+    """Minify SVG content produced by matplotlib.
+
+    Rounds the numbers in path data and positions to the given precision,
+    removes definitions identical to an earlier one and points their
+    references to it, and removes indentation. If a directory is given,
+    embedded raster images are written to files named by their content
+    hash, and referenced by `base_url` followed by the file name. A relative
+    base URL, such as "images/", is resolved by the browser against the
+    page or file that shows the SVG content, so it must point to the
+    directory from there. Use an absolute URL if the SVG content is shown
+    from several places.
+
+    Args:
+        xml (str): The SVG content.
+        precision (int): The number of decimal places kept in path data
+            and positions.
+        directory (Path | None): The directory to extract embedded raster
+            images to, or None to keep them embedded.
+        base_url (str | None): The URL the extracted images are referenced
+            under, required with a directory.
+
+    Returns:
+        str: The minified SVG content.
+
+    Raises:
+        ValueError: If a directory is given without a base URL.
+    """
+    _check_base_url(directory, base_url)
+
+    def round_number(match: re.Match[str]) -> str:
+        text = f"{float(match.group()):.{precision}f}"
+        if "." in text:
+            text = text.rstrip("0").rstrip(".")
+        return "0" if text == "-0" else text
+
+    def shorten(match: re.Match[str]) -> str:
+        return NUMBER_PATTERN.sub(round_number, " ".join(match.group().split()))
+
+    xml = COORDINATES_PATTERN.sub(shorten, xml)
+
+    seen: dict[str, str] = {}
+    aliases: dict[str, str] = {}
+
+    def dedupe(match: re.Match[str]) -> str:
+        identifier = match.group(2)
+        key = match.group().replace(f' id="{identifier}"', "", 1)
+        if first := seen.get(key):
+            aliases[identifier] = first
+            return ""
+        seen[key] = identifier
+        return match.group()
+
+    xml = DEFS_PATTERN.sub(lambda m: DEF_PATTERN.sub(dedupe, m.group()), xml)
+
+    if aliases:
+        xml = EMPTY_DEFS_PATTERN.sub("", xml)
+        xml = REFERENCE_PATTERN.sub(lambda m: f"#{aliases.get(m[1], m[1])}", xml)
+
+    xml = INDENT_PATTERN.sub("\n<", xml)
+
+    if directory is None or base_url is None:
+        return xml
+
+    from nbstore.store import write_bytes
+
+    def extract(match: re.Match[str]) -> str:
+        data = base64.b64decode("".join(match.group(2).split()))
+        name = f"{hashlib.blake2b(data, digest_size=16).hexdigest()}.{match[1]}"
+        if not (path := directory / name).exists():
+            write_bytes(path, data)
+        return f"{base_url.rstrip('/')}/{name}"
+
+    directory.mkdir(parents=True, exist_ok=True)
+    return RASTER_PATTERN.sub(extract, xml)
+
+
+def _check_base_url(directory: str | Path | None, base_url: str | None) -> None:
+    if directory is not None and base_url is None:
+        msg = "base_url is required to extract raster images to a directory"
+        raise ValueError(msg)
+
+
+def _minify_svg(xml: str) -> tuple[str, dict]:
+    """Minify SVG content with the shared options.
+
+    Args:
+        xml (str): The SVG content.
+
+    Returns:
+        tuple[str, dict]: The minified SVG content and its metadata.
+    """
+    before = len(xml.encode())
+    options = SVG_MINIFY
+    xml = minify_svg(xml, options.precision, options.directory, options.base_url)
+    return xml, {"minify": {"before": before, "after": len(xml.encode())}}
+
+
+@dataclass
+class RasterOptions:
+    """Options of the raster formats.
+
+    Attributes:
+        dpi (float | None): The resolution in dots per inch, or None to use
+            the resolution of each figure.
+        max_size (int | None): The maximum width and height in pixels. The
+            resolution is lowered for figures that would exceed it.
+        optimize (bool): Whether to compress the output harder, without
+            losing quality.
+    """
+
+    dpi: float | None = None
+    max_size: int | None = None
+    optimize: bool = False
+
+
+RASTER = RasterOptions()
+"""The options of the raster formats shared by all formatters."""
+
+
+def set_raster_options(
+    dpi: float | None = None,
+    *,
+    max_size: int | None = None,
+    optimize: bool = False,
+) -> None:
+    """Set the options of the raster formats.
+
+    Args:
+        dpi (float | None): The resolution in dots per inch, or None to use
+            the resolution of each figure.
+        max_size (int | None): The maximum width and height in pixels.
+        optimize (bool): Whether to compress the output harder, without
+            losing quality.
+    """
+    RASTER.dpi = dpi
+    RASTER.max_size = max_size
+    RASTER.optimize = optimize
+
+
+def get_raster_dpi(fig: Figure) -> float:
+    """Get the resolution to rasterize a matplotlib figure with.
+
+    The size limit is applied to the size of the figure, which is an upper
+    bound of the size of the output for most figures saved with a tight
+    bounding box.
+
+    Args:
+        fig (Figure): The matplotlib figure.
+
+    Returns:
+        float: The resolution in dots per inch.
+    """
+    dpi = RASTER.dpi or fig.dpi
+
+    if RASTER.max_size:
+        dpi = min(dpi, RASTER.max_size / max(fig.get_size_inches()))
+
+    return dpi
+
+
+def matplotlib_figure_to_png(fig: Figure) -> bytes:
+    """Convert a matplotlib figure to PNG format.
+
     Args:
         fig (Figure): The matplotlib figure to convert.
 
     Returns:
-        str: The SVG content as a string.
+        bytes: The PNG content as bytes.
     """
-    with io.StringIO() as fp:
-        fig.savefig(fp, format="svg", bbox_inches="tight")
+    return _render(fig, "png")
+
+
+def _figure_to_png(fig: Figure, bbox_inches: Bbox | str) -> bytes:
+    pil_kwargs: dict[str, bool | int] = {"optimize": True} if RASTER.optimize else {}
+    return _figure_to_raster(fig, bbox_inches, "png", pil_kwargs)
+
+
+def matplotlib_figure_to_webp(fig: Figure) -> bytes:
+    """Convert a matplotlib figure to lossless WebP format.
+
+    Args:
+        fig (Figure): The matplotlib figure to convert.
+
+    Returns:
+        bytes: The WebP content as bytes.
+    """
+    return _render(fig, "webp")
+
+
+def _figure_to_webp(fig: Figure, bbox_inches: Bbox | str) -> bytes:
+    pil_kwargs: dict[str, bool | int] = {"lossless": True}
+    pil_kwargs["method"] = 6 if RASTER.optimize else 4
+    return _figure_to_raster(fig, bbox_inches, "webp", pil_kwargs)
+
+
+def _figure_to_raster(
+    fig: Figure,
+    bbox_inches: Bbox | str,
+    fmt: str,
+    pil_kwargs: dict[str, bool | int],
+) -> bytes:
+    dpi = get_raster_dpi(fig)
+
+    with io.BytesIO() as fp:
+        fig.savefig(
+            fp,
+            format=fmt,
+            dpi=dpi,
+            bbox_inches=bbox_inches,
+            pil_kwargs=pil_kwargs,
+        )
         return fp.getvalue()
 
 
+def is_available(fmt: str) -> bool:
+    """Check whether a format can be rendered.
+
+    WebP needs a Pillow built with WebP support.
+
+    Args:
+        fmt (str): The format to check.
+
+    Returns:
+        bool: True if the format can be rendered.
+    """
+    if fmt not in MIMES:
+        return False
+
+    if fmt == "webp":
+        from PIL import features
+
+        return bool(features.check("webp"))
+
+    return True
+
+
+RENDERERS: dict[str, Callable[[Figure, Bbox | str], bytes]] = {
+    "pgf": _figure_to_pgf,
+    "pdf": _figure_to_pdf,
+    "svg": _figure_to_svg,
+    "png": _figure_to_png,
+    "webp": _figure_to_webp,
+}
+
+
+def matplotlib_figure_to_mimebundle(
+    fig: Figure,
+    formats: Iterable[str],
+) -> tuple[dict[str, str | bytes], dict[str, dict]]:
+    """Convert a matplotlib figure to several formats at once.
+
+    Each format measures its own tight bounding box with its own renderer,
+    so that the output of a format is the same as when it is rendered alone.
+
+    Args:
+        fig (Figure): The matplotlib figure to convert.
+        formats (Iterable[str]): The formats to convert to ('pgf', 'pdf',
+            'svg', 'png', 'webp').
+
+    Returns:
+        tuple[dict[str, str | bytes], dict[str, dict]]: The converted figure
+        and its metadata keyed by MIME type.
+    """
+    bundle: dict[str, str | bytes] = {}
+    metadata: dict[str, dict] = {}
+
+    for fmt in formats:
+        data = _render(fig, fmt)
+        mime = MIMES[fmt]
+
+        if fmt not in {"pgf", "svg"}:
+            bundle[mime] = data
+        elif fmt == "svg" and SVG_MINIFY.enabled:
+            bundle[mime], metadata[mime] = _minify_svg(data.decode())
+        else:
+            bundle[mime] = data.decode()
+
+    return bundle, metadata
+
+
+PLOTTERS: WeakKeyDictionary[Plot, Plotter] = WeakKeyDictionary()
+"""The compiled seaborn plots of the current display cycle."""
+
+
+def get_plotter(plot: Plot) -> Plotter:
+    """Compile a seaborn plot, reusing the result within a display cycle.
+
+    When formatters for several formats are registered, each of them is
+    called with the same plot. The compiled plot is kept until the cell
+    finishes executing, so that the plot is compiled only once.
+
+    Args:
+        plot (Plot): The seaborn plot to compile.
+
+    Returns:
+        Plotter: The compiled plot.
+    """
+    if (plotter := PLOTTERS.get(plot)) is None:
+        plotter = PLOTTERS[plot] = plot.plot()
+
+    return plotter
+
+
 def seaborn_plot_to_pgf(plot: Plot, rp: RepresentationPrinter, cycle) -> None:
     """Convert a seaborn plot to PGF format.
 
@@ -117,7 +736,7 @@ def seaborn_plot_to_pgf(plot: Plot, rp: RepresentationPrinter, cycle) -> None:
     """
     from seaborn._core.plot import theme_context
 
-    plotter = plot.plot()
+    plotter = get_plotter(plot)
     with theme_context(plotter._theme):
         return matplotlib_figure_to_pgf(plotter._figure, rp, cycle)
 
@@ -133,31 +752,88 @@ def seaborn_plot_to_pdf(plot: Plot) -> bytes:
     """
     from seaborn._core.plot import theme_context
 
-    plotter = plot.plot()
+    plotter = get_plotter(plot)
     with theme_context(plotter._theme):
         return matplotlib_figure_to_pdf(plotter._figure)
 
 
-def seaborn_plot_to_svg(plot: Plot) -> str:
+def seaborn_plot_to_svg(plot: Plot) -> str | tuple[str, dict]:
     """Convert a seaborn plot to SVG format.
 
     Args:
         plot (Plot): The seaborn plot to convert.
 
     Returns:
-        str: The SVG content as a string.
+        str | tuple[str, dict]: The SVG content as a string, or the minified
+        content and its metadata.
     """
     from seaborn._core.plot import theme_context
 
-    plotter = plot.plot()
+    plotter = get_plotter(plot)
     with theme_context(plotter._theme):
         return matplotlib_figure_to_svg(plotter._figure)
 
 
+def seaborn_plot_to_png(plot: Plot) -> bytes:
+    """Convert a seaborn plot to PNG format.
+
+    Args:
+        plot (Plot): The seaborn plot to convert.
+
+    Returns:
+        bytes: The PNG content as bytes.
+    """
+    from seaborn._core.plot import theme_context
+
+    plotter = get_plotter(plot)
+    with theme_context(plotter._theme):
+        return matplotlib_figure_to_png(plotter._figure)
+
+
+def seaborn_plot_to_webp(plot: Plot) -> bytes:
+    """Convert a seaborn plot to lossless WebP format.
+
+    Args:
+        plot (Plot): The seaborn plot to convert.
+
+    Returns:
+        bytes: The WebP content as bytes.
+    """
+    from seaborn._core.plot import theme_context
+
+    plotter = get_plotter(plot)
+    with theme_context(plotter._theme):
+        return matplotlib_figure_to_webp(plotter._figure)
+
+
+def seaborn_plot_to_mimebundle(
+    plot: Plot,
+    formats: Iterable[str],
+) -> tuple[dict[str, str | bytes], dict[str, dict]]:
+    """Convert a seaborn plot to several formats at once.
+
+    Args:
+        plot (Plot): The seaborn plot to convert.
+        formats (Iterable[str]): The formats to convert to ('pgf', 'pdf',
+            'svg', 'png', 'webp').
+
+    Returns:
+        tuple[dict[str, str | bytes], dict[str, dict]]: The converted plot
+        and its metadata keyed by MIME type.
+    """
+    from seaborn._core.plot import theme_context
+
+    plotter = get_plotter(plot)
+    with theme_context(plotter._theme):
+        return matplotlib_figure_to_mimebundle(plotter._figure, formats)
+
+
 MIMES: dict[str, str] = {
     "pgf": "text/plain",
     "pdf": "application/pdf",
     "svg": "image/svg+xml",
+    "png": "image/png",
+    "webp": "image/webp",
 }
 
 MODULE_CLASSES: dict[str, list[tuple[str, str]]] = {
@@ -170,20 +846,42 @@ FUNCTIONS: dict[tuple[str, str], dict[str, Callable]] = {
         "pgf": matplotlib_figure_to_pgf,
         "pdf": matplotlib_figure_to_pdf,
         "svg": matplotlib_figure_to_svg,
+        "png": matplotlib_figure_to_png,
+        "webp": matplotlib_figure_to_webp,
     },
     ("seaborn._core.plot", "Plot"): {
         "pgf": seaborn_plot_to_pgf,
         "pdf": seaborn_plot_to_pdf,
         "svg": seaborn_plot_to_svg,
+        "png": seaborn_plot_to_png,
+        "webp": seaborn_plot_to_webp,
     },
 }
 
 
-try:
-    from holoviews.ipython.display_hooks import display_hook, image_display
+MIMEBUNDLE_FUNCTIONS: dict[tuple[str, str], Callable] = {
+    ("matplotlib.figure", "Figure"): matplotlib_figure_to_mimebundle,
+    ("seaborn._core.plot", "Plot"): seaborn_plot_to_mimebundle,
+}
+
+
+@cache
+def get_pgf_display() -> Callable | None:
+    """Get a holoviews display hook that renders elements to PGF.
+
+    The hook is created on first use, since importing holoviews is expensive.
+
+    Returns:
+        Callable | None: The display hook, or None if holoviews is not
+        installed.
+    """
+    try:
+        from holoviews.ipython.display_hooks import display_hook, image_display
+    except ModuleNotFoundError:  # no cov
+        return None
 
     @display_hook
-    def pgf_display(element, max_frames):
+    def pgf_display(element, max_frames) -> tuple[dict, dict] | None:
         """Used to render elements to PGF if requested in the display formats.
 
         Args:
@@ -191,12 +889,11 @@ try:
             max_frames: Maximum number of frames to render.
 
         Returns:
-            The rendered element.
+            tuple[dict, dict] | None: The rendered element.
         """
         return image_display(element, max_frames, fmt="pgf")
 
-except ModuleNotFoundError:  # no cov
-    pgf_display = None  # pyright: ignore[reportAssignmentType]
+    return pgf_display
 
 
 def set_formatter_holoviews(fmt: str) -> None:
@@ -213,27 +910,44 @@ def set_formatter_holoviews(fmt: str) -> None:
     if fmt not in Store.display_formats:
         Store.display_formats.append(fmt)
 
-    if fmt == "pgf" and pgf_display:  # pyright: ignore[reportUnnecessaryComparison]
+    if fmt == "pgf" and (pgf_display := get_pgf_display()):
         Store.set_display_hook(fmt, LabelledData, pgf_display)
 
 
-def set_formatter(module: str, fmt: str, ip: InteractiveShell | None = None) -> None:
+def set_formatter(
+    module: str,
+    fmt: str | Sequence[str],
+    ip: InteractiveShell | None = None,
+    *,
+    deterministic: bool = False,
+) -> None:
     """Set a formatter for visualization outputs.
 
     Registers a formatter for the specified module and format with IPython.
+    If several formats are given, a single formatter emits all of them from
+    one display, sharing the layout computation between the formats.
 
     Args:
         module (str): The module to set the formatter for ('matplotlib',
             'seaborn', 'holoviews').
-        fmt (str): The format to use ('pgf', 'pdf', 'svg').
+        fmt (str | Sequence[str]): The format or formats to use ('pgf', 'pdf',
+            'svg', 'png', 'webp').
         ip: Optional IPython instance. If None, get_ipython() is used.
+        deterministic (bool): Whether to make identical figures render to
+            identical bytes. See `set_deterministic`.
 
     Raises:
         NotImplementedError: If the format is not supported.
         ModuleNotFoundError: If IPython is not installed.
     """
+    formats = [fmt] if isinstance(fmt, str) else list(fmt)
+
+    if deterministic:
+        set_deterministic()
+
     if module == "holoviews":
-        set_formatter_holoviews(fmt)
+        for f in formats:
+            set_formatter_holoviews(f)
         return
 
     try:
@@ -245,12 +959,43 @@ def set_formatter(module: str, fmt: str, ip: InteractiveShell | None = None) ->
     if not ip and not (ip := get_ipython()):
         return
 
-    if not (mime := MIMES.get(fmt)):
+    if not formats or not all(is_available(f) for f in formats):
         raise NotImplementedError
 
-    formatter = ip.display_formatter.formatters[mime]  # pyright: ignore[reportOptionalMemberAccess]
+    if module == "seaborn":
+        ip.events.register("post_execute", PLOTTERS.clear)
+
+    mime = MIMES[formats[0]]
+    formatters = ip.display_formatter.formatters  # pyright: ignore[reportOptionalMemberAccess]
+
+    # IPython has no formatter for some MIME types, such as WebP.
+    if len(formats) > 1 or mime not in formatters:
+        _set_mimebundle_formatter(module, formats, ip)
+        return
+
+    formatter = formatters[mime]
 
     if module_classes := MODULE_CLASSES.get(module):
         for module_class in module_classes:
-            if function := FUNCTIONS.get(module_class, {}).get(fmt):
+            if function := FUNCTIONS.get(module_class, {}).get(formats[0]):
                 formatter.for_type_by_name(*module_class, function)
+
+
+def _set_mimebundle_formatter(
+    module: str,
+    formats: list[str],
+    ip: InteractiveShell,
+) -> None:
+    """Set a formatter that emits several formats from one display.
+
+    Args:
+        module (str): The module to set the formatter for.
+        formats (list[str]): The formats to emit.
+        ip (InteractiveShell): The IPython instance.
+    """
+    formatter = ip.display_formatter.mimebundle_formatter  # pyright: ignore[reportOptionalMemberAccess]
+
+    for module_class in MODULE_CLASSES.get(module, []):
+        if function := MIMEBUNDLE_FUNCTIONS.get(module_class):
+            function = partial(function, formats=formats)
+            formatter.for_type_by_name(*module_class, function)
@@ -10,12 +10,13 @@ from __future__ import annotations
 
 import re
 import textwrap
-from dataclasses import dataclass
-from functools import cache
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field, replace
 from itertools import takewhile
-from typing import TYPE_CHECKING, ClassVar, TypeGuard
+from operator import itemgetter
+from typing import IO, TYPE_CHECKING, ClassVar, TypeGuard, cast
 
-import nbformat
+from nbstore.cache import LRUCache, digest
 
 if TYPE_CHECKING:
     from collections.abc import Iterable, Iterator
@@ -23,9 +24,16 @@ if TYPE_CHECKING:
 
     from nbformat import NotebookNode
 
+    Attributes = tuple[str, tuple[str, ...], tuple[tuple[str, str], ...]]
+
 # pyright: reportUnknownMemberType=false
 
 
+SPLIT_PATTERN = re.compile(r"[ \"'`]")
+QUOTE_PATTERN = re.compile(r"[\"'`\\]")
+QUOTES = {'"': 1, "'": 2, "`": 4}
+
+
 def _split(text: str) -> Iterator[str]:
     """Split text into parts while respecting quoted strings.
 
@@ -38,28 +46,32 @@ def _split(text: str) -> Iterator[str]:
     Yields:
         str: The split parts.
     """
-    in_quotes = {'"': False, "'": False, "`": False}
+    if not QUOTE_PATTERN.search(text):
+        yield from filter(None, text.split(" "))
+        return
 
-    chars = list(text)
+    quotes = 0  # bit set of the open quotes
     start = 0
 
-    for cursor, char in enumerate(chars):
-        if cursor > 0 and chars[cursor - 1] == "\\":
+    for match in SPLIT_PATTERN.finditer(text):
+        cursor = match.start()
+        if cursor > 0 and text[cursor - 1] == "\\":
             continue
 
-        for q, in_ in in_quotes.items():
-            if char == q:
-                if in_:
-                    yield text[start : cursor + 1]
-                    start = cursor + 1
-                in_quotes[q] = not in_
-
+        char = match.group()
         if char == " ":
-            if not any(in_quotes.values()):
+            if not quotes:
                 if start < cursor:
                     yield text[start:cursor]
                 start = cursor + 1
 
+        else:
+            quote = QUOTES[char]
+            if quotes & quote:
+                yield text[start : cursor + 1]
+                start = cursor + 1
+            quotes ^= quote
+
     if start < len(text):
         yield text[start:]
 
@@ -78,6 +90,10 @@ def split(text: str) -> Iterator[str]:
     """
     parts = list(_split(text))
 
+    if "=" not in parts:
+        yield from parts
+        return
+
     start = 0
     for cursor, part in enumerate(parts):
         if part == "=" and 0 < cursor < len(parts) - 1:
@@ -199,7 +215,33 @@ def _parse(text: str) -> tuple[str, list[str], dict[str, str]]:
     return identifier, classes, attributes
 
 
-@dataclass
+ATTRIBUTES: LRUCache[str, Attributes] = LRUCache(maxsize=1024)
+"""The most recently parsed attribute texts, keyed by the raw text."""
+
+
+def _parse_cached(text: str) -> tuple[str, list[str], dict[str, str]]:
+    """Parse attribute text, reusing the result for a recurring text.
+
+    The cache holds immutable results, and each call returns a new list
+    and dictionary, so that modifying an element does not affect others.
+
+    Args:
+        text (str): The attribute text to parse.
+
+    Returns:
+        tuple[str, list[str], dict[str, str]]: The identifier, classes, and
+            attributes as returned by `_parse`.
+    """
+    if not (parsed := ATTRIBUTES.get(text)):
+        identifier, classes, attributes = _parse(text)
+        parsed = identifier, tuple(classes), tuple(attributes.items())
+        ATTRIBUTES.set(text, parsed)
+
+    identifier, classes, attributes = parsed
+    return identifier, list(classes), dict(attributes)
+
+
+@dataclass(slots=True)
 class Matcher:
     pattern: ClassVar[re.Pattern[str]]
 
@@ -244,7 +286,7 @@ class Matcher:
                 yield match
 
 
-@dataclass
+@dataclass(slots=True)
 class Comment(Matcher):
     """A comment in Markdown."""
 
@@ -254,7 +296,7 @@ class Comment(Matcher):
     )
 
 
-@dataclass
+@dataclass(slots=True)
 class Element(Matcher):
     """Base class for Markdown elements with attributes.
 
@@ -310,7 +352,7 @@ class Element(Matcher):
                     yield f"{k}={_quote(v)}"
 
 
-@dataclass
+@dataclass(slots=True)
 class CodeBlock(Element):
     """A code block in Markdown.
 
@@ -330,9 +372,20 @@ class CodeBlock(Element):
 
     @classmethod
     def from_match(cls, match: re.Match[str]) -> Self:
-        text = match.group(0)
-        body = match.group("body")
-        pre = match.group("pre")
+        return cls.from_parts(match.group(0), match.group("pre"), match.group("body"))
+
+    @classmethod
+    def from_parts(cls, text: str, pre: str, body: str) -> Self:
+        """Create a code block from its parts.
+
+        Args:
+            text (str): The whole text of the code block.
+            pre (str): The opening fence, including the indent.
+            body (str): The text between the opening and closing fences.
+
+        Returns:
+            Self: The created code block.
+        """
         indent = "".join(takewhile(str.isspace, pre))
 
         if "\n" in body:
@@ -342,7 +395,7 @@ class CodeBlock(Element):
             attr, source = body, ""
 
         attr = " ".join(_remove_braces(attr.strip()))
-        identifier, classes, attributes = _parse(attr)
+        identifier, classes, attributes = _parse_cached(attr)
 
         url = ""
 
@@ -383,7 +436,7 @@ def _remove_braces(text: str) -> Iterator[str]:
             yield part
 
 
-@dataclass
+@dataclass(slots=True)
 class Image(Element):
     """An image in Markdown.
 
@@ -402,7 +455,23 @@ class Image(Element):
 
     @classmethod
     def from_match(cls, match: re.Match[str]) -> Self:
-        identifier, classes, attributes = _parse(match.group("attr"))
+        alt, url, attr = match.group("alt", "url", "attr")
+        return cls.from_parts(match.group(0), alt, url, attr)
+
+    @classmethod
+    def from_parts(cls, text: str, alt: str, url: str, attr: str) -> Self:
+        """Create an image from its parts.
+
+        Args:
+            text (str): The whole text of the image.
+            alt (str): The alt text.
+            url (str): The URL.
+            attr (str): The attribute text inside the braces.
+
+        Returns:
+            Self: The created image.
+        """
+        identifier, classes, attributes = _parse_cached(attr)
 
         source = ""
 
@@ -413,26 +482,56 @@ class Image(Element):
                 break
 
         return cls(
-            match.group(0),
+            text,
             identifier,
             classes,
             attributes,
             source=source,
-            url=match.group("url"),
-            alt=match.group("alt"),
+            url=url,
+            alt=alt,
         )
 
 
+DEFAULT_CLASSES: tuple[type[Matcher], ...] = (Comment, CodeBlock, Image)
+
+
 def parse(
     text: str,
     pos: int = 0,
     endpos: int | None = None,
-    classes: tuple[type[Matcher], ...] = (Comment, CodeBlock, Image),
+    classes: tuple[type[Matcher], ...] = DEFAULT_CLASSES,
 ) -> Iterator[CodeBlock | Image | str]:
     """Parse the text and yield elements.
 
     Finds all occurrences of the specified element types in the text and
     yields either element instances or text segments between elements.
+    The default element types are found by a single scan of the text.
+
+    Args:
+        text (str): The text to search.
+        pos (int): The starting position.
+        endpos (int | None): The ending position.
+        classes (tuple[type[Element], ...]): The element types to find.
+
+    Returns:
+        Iterator[Element | str]: Element instances or text segments.
+    """
+    if classes == DEFAULT_CLASSES:
+        return _lex(text, pos, endpos)
+
+    return _parse_nested(text, pos, endpos, classes)
+
+
+def _parse_nested(
+    text: str,
+    pos: int = 0,
+    endpos: int | None = None,
+    classes: tuple[type[Matcher], ...] = DEFAULT_CLASSES,
+) -> Iterator[CodeBlock | Image | str]:
+    """Parse the text by scanning it once for each element type.
+
+    Elements of the first type are found in the whole text, and elements
+    of the following types are found in the gaps between them, recursively.
 
     Args:
         text (str): The text to search.
@@ -457,7 +556,8 @@ def parse(
                 raise NotImplementedError
 
             indent = _get_indent(text[elem[0] : elem[1]])
-            yield from parse(text, elem[0], elem[1] - len(indent), classes[1:])
+            end = elem[1] - len(indent)
+            yield from _parse_nested(text, elem[0], end, classes[1:])
 
         elif isinstance(elem, CodeBlock | Image):
             if isinstance(elem, Image):
@@ -472,18 +572,759 @@ def parse(
             raise NotImplementedError
 
 
+# A newline is faster to find than a line start with `re.MULTILINE`.
+TOKEN_PATTERN = re.compile(r"<!--|!\[|\n *[~`]{3}")
+FENCE_PATTERN = re.compile(r" *[~`]{3}")
+
+
+def _lex(
+    text: str,
+    pos: int = 0,
+    endpos: int | None = None,
+) -> Iterator[CodeBlock | Image | str]:
+    """Parse the text by scanning it once for comments, code blocks, and images.
+
+    Yields the same elements as `_parse_nested` with the default classes.
+    Candidate positions of all element types are found in a single pass.
+    Comments take precedence over code blocks, and code blocks over images,
+    so that a code block must end before the next comment, and an image
+    before the next comment or code block.
+
+    Args:
+        text (str): The text to search.
+        pos (int): The starting position.
+        endpos (int | None): The ending position.
+
+    Yields:
+        CodeBlock | Image | str: Element instances or text segments.
+    """
+    if endpos is None:
+        endpos = len(text)
+
+    scanner = _Scanner(text, pos, endpos)
+    comment = scanner.comment(pos)
+    cursor = pos
+    indented = False  # An indent before a comment cannot be handled.
+
+    for start in _iter_tokens(text, pos, endpos):
+        if start < cursor:
+            continue
+
+        if comment and start == comment[0]:
+            end, elem = comment[1], None
+            comment = scanner.comment(end)
+        else:
+            limit = comment[0] if comment else endpos
+            if not (found := scanner.match(start, limit)):
+                continue
+            end, elem = found
+
+        gap = text[cursor:start]
+        if indented and (gap or elem):
+            raise NotImplementedError
+
+        indent = _get_indent(gap)
+        if gap := gap[: len(gap) - len(indent)]:
+            yield gap
+
+        if elem is None:
+            yield text[start:end]
+            indented = indented or bool(indent)
+        else:
+            yield _set_indent(elem, indent)
+
+        cursor = end
+
+    if gap := text[cursor:endpos]:
+        if indented:
+            raise NotImplementedError
+
+        yield gap[: len(gap) - len(_get_indent(gap))]
+
+
+def _iter_tokens(text: str, pos: int, endpos: int) -> Iterator[int]:
+    """Yield the candidate positions of comments, code blocks, and images.
+
+    Args:
+        text (str): The text to search.
+        pos (int): The starting position.
+        endpos (int): The ending position.
+
+    Yields:
+        int: The candidate positions.
+    """
+    if (pos == 0 or text[pos - 1] == "\n") and FENCE_PATTERN.match(text, pos, endpos):
+        yield pos
+
+    for token in TOKEN_PATTERN.finditer(text, pos, endpos):
+        start = token.start()
+        yield start + 1 if text[start] == "\n" else start
+
+
+def _set_indent(elem: CodeBlock | Image, indent: str) -> CodeBlock | Image:
+    if isinstance(elem, Image):
+        elem.indent = indent
+        elem.text = f"{indent}{elem.text}"
+
+    return elem
+
+
+FENCE_LINE_PATTERN = re.compile(r"\n( *)([~`]{3,})")
+FENCE_RUN_PATTERN = re.compile(r"( *)([~`]{3,})")
+ALT_END_PATTERN = re.compile(r"\]\(")
+URL_END_PATTERN = re.compile(r"\)\{")
+ATTR_END_PATTERN = re.compile(r"\}(?!`)")
+
+
+class _Finder:
+    """Find the next match of a pattern, reusing the last result.
+
+    Positions are mostly requested in increasing order while lexing, so
+    that the text is scanned only once in total, even if many candidates
+    fail to match.
+    """
+
+    def __init__(self, pattern: re.Pattern[str], text: str, endpos: int) -> None:
+        self.pattern: re.Pattern[str] = pattern
+        self.text: str = text
+        self.endpos: int = endpos
+        self.pos: int = endpos + 1
+        self.last: int = -1
+
+    def find(self, pos: int) -> int:
+        """Find the start of the first match at or after a position.
+
+        Args:
+            pos (int): The position to search from.
+
+        Returns:
+            int: The start of the match, or -1 if not found.
+        """
+        if self.pos <= pos and (self.last == -1 or pos <= self.last):
+            return self.last
+
+        match = self.pattern.search(self.text, pos, self.endpos)
+        self.pos, self.last = pos, match.start() if match else -1
+        return self.last
+
+
+@dataclass(slots=True)
+class _FenceNode:
+    """A node of the trie of fence lines.
+
+    Attributes:
+        length (int): The length of the fence of this node, including the
+            indent.
+        children (dict[str, _FenceNode]): The nodes for the next fence character.
+        starts (list[int]): The starts of the lines beginning with the fence of
+            this node.
+    """
+
+    length: int
+    children: dict[str, _FenceNode] = field(default_factory=dict)
+    starts: list[int] = field(default_factory=list)
+
+
+class _Scanner:
+    """Match comments, code blocks, and images in linear time.
+
+    Matches the same text as the `pattern` of `Comment`, `CodeBlock`, and
+    `Image`, without scanning to the end of the text for every unclosed
+    fence or image. Closing fences are looked up in a trie of the fence
+    lines keyed by their indent and fence characters.
+    """
+
+    def __init__(self, text: str, pos: int, endpos: int) -> None:
+        self.text: str = text
+        self.pos: int = pos
+        self.endpos: int = endpos
+        self.alt: _Finder = _Finder(ALT_END_PATTERN, text, endpos)
+        self.url: _Finder = _Finder(URL_END_PATTERN, text, endpos)
+        self.attr: _Finder = _Finder(ATTR_END_PATTERN, text, endpos)
+        self.fences: dict[tuple[int, str], _FenceNode] | None = None
+        self.lines: list[int] = []
+        self.limit: int = -1
+        self.code_blocks: dict[int, tuple[int, str] | None] = {}
+        self.next_code_block: tuple[int, int] = (endpos + 1, -1)
+
+    def comment(self, pos: int) -> tuple[int, int] | None:
+        """Find the next comment.
+
+        Args:
+            pos (int): The position to search from.
+
+        Returns:
+            tuple[int, int] | None: The start and end of the comment, or
+                None if not found.
+        """
+        start = self.text.find("<!--", pos, self.endpos)
+        if start == -1:
+            return None
+
+        end = self.text.find("-->", start + 4, self.endpos)
+        return None if end == -1 else (start, end + 3)
+
+    def match(self, start: int, limit: int) -> tuple[int, CodeBlock | Image] | None:
+        """Match a code block or an image at the start position.
+
+        An image must end before the next code block.
+
+        Args:
+            start (int): The starting position of the element.
+            limit (int): The position before which the element must end.
+
+        Returns:
+            tuple[int, CodeBlock | Image] | None: The end position and the
+                element, or None if not matched.
+        """
+        text = self.text
+
+        if text[start] != "!":
+            if not (code_block := self.code_block(start, limit)):
+                return None
+
+            end, pre = code_block
+            body = text[start + len(pre) : end - len(pre) - 1]
+            return end, CodeBlock.from_parts(text[start:end], pre, body)
+
+        if not (image := self.image(start, limit)):
+            return None
+
+        alt, url, end = image
+        if "\n" in text[start:end] and self.find_code_block(start, limit) < end:
+            return None
+
+        parts = text[start + 2 : alt], text[alt + 2 : url], text[url + 2 : end - 1]
+        return end, Image.from_parts(text[start:end], *parts)
+
+    def image(self, start: int, limit: int) -> tuple[int, int, int] | None:
+        """Match an image at the start position.
+
+        Args:
+            start (int): The starting position of the image.
+            limit (int): The position before which the image must end.
+
+        Returns:
+            tuple[int, int, int] | None: The positions of the end of the alt
+                text, the end of the URL, and the end of the image, or None
+                if not matched.
+        """
+        if start > 0 and self.text[start - 1] == "`":
+            return None
+
+        alt = self.alt.find(start + 2)
+        if alt == -1 or alt + 2 > limit:
+            return None
+
+        url = self.url.find(alt + 2)
+        if url == -1 or url + 2 > limit:
+            return None
+
+        # A brace followed by a backtick is allowed at the limit.
+        attr = self.attr.find(url + 2)
+        if attr == -1 or attr >= limit:
+            attr = limit - 1 if self.text[url + 2 : limit].endswith("}") else -1
+
+        return None if attr == -1 else (alt, url, attr + 1)
+
+    def code_block(self, start: int, limit: int) -> tuple[int, str] | None:
+        """Match a code block at the start of a line.
+
+        Args:
+            start (int): The starting position of the code block.
+            limit (int): The position before which the code block must end.
+
+        Returns:
+            tuple[int, str] | None: The end position and the opening fence,
+                or None if not matched.
+        """
+        self._set_limit(limit)
+
+        if start not in self.code_blocks:
+            self.code_blocks[start] = self._code_block(start, limit)
+
+        return self.code_blocks[start]
+
+    def _set_limit(self, limit: int) -> None:
+        if limit != self.limit:
+            self.limit = limit
+            self.code_blocks = {}
+            self.next_code_block = (self.endpos + 1, -1)
+
+    def _code_block(self, start: int, limit: int) -> tuple[int, str] | None:
+        if not (match := FENCE_RUN_PATTERN.match(self.text, start, limit)):
+            return None
+
+        indent, fence = match.groups()
+        if (node := self._get_fences().get((len(indent), fence[:3]))) is None:
+            return None
+
+        nodes = [node]
+        for char in fence[3:]:
+            if (node := node.children.get(char)) is None:
+                break
+            nodes.append(node)
+
+        # The longest fence is tried first, and then the first closing fence.
+        for node in reversed(nodes):
+            index = bisect_right(node.starts, start)
+            if index < len(node.starts):
+                end = node.starts[index] + node.length
+                if end <= limit:
+                    return end, self.text[start : start + node.length]
+
+        return None
+
+    def _get_fences(self) -> dict[tuple[int, str], _FenceNode]:
+        if self.fences is not None:
+            return self.fences
+
+        self.fences = {}
+        text, pos = self.text, self.pos
+
+        matches: list[re.Match[str]] = []
+        first = pos == 0 or text[pos - 1] == "\n"
+        if first and (match := FENCE_RUN_PATTERN.match(text, pos, self.endpos)):
+            matches.append(match)
+        matches.extend(FENCE_LINE_PATTERN.finditer(text, pos, self.endpos))
+
+        for match in matches:
+            start = match.start(1)
+            self.lines.append(start)
+            indent, fence = match.groups()
+            key = len(indent), fence[:3]
+            if (node := self.fences.get(key)) is None:
+                node = self.fences[key] = _FenceNode(len(indent) + 3)
+            node.starts.append(start)
+
+            for char in fence[3:]:
+                if (child := node.children.get(char)) is None:
+                    child = node.children[char] = _FenceNode(node.length + 1)
+                node = child
+                node.starts.append(start)
+
+        return self.fences
+
+    def find_code_block(self, pos: int, limit: int) -> int:
+        """Find the first code block at or after a position.
+
+        Args:
+            pos (int): The position to search from.
+            limit (int): The position before which the code block must end.
+
+        Returns:
+            int: The start of the code block, or the limit if not found.
+        """
+        self._get_fences()
+        self._set_limit(limit)
+
+        last_pos, last = self.next_code_block
+        if last_pos <= pos and (last == -1 or pos <= last):
+            return limit if last == -1 else last
+
+        last = -1
+        for start in self.lines[bisect_left(self.lines, pos) :]:
+            if start >= limit:
+                break
+            if self.code_block(start, limit):
+                last = start
+                break
+
+        self.next_code_block = (pos, last)
+        return limit if last == -1 else last
+
+
 def _get_indent(text: str) -> str:
-    if "\n" not in text:
+    index = text.rfind("\n")
+    if index == -1:
         return ""
 
-    indent = text.rsplit("\n", 1)[-1]
-    if all(c.isspace() for c in indent):
+    indent = text[index + 1 :]
+    if indent.isspace():
         return indent
 
     return ""
 
 
-@cache
+CHUNK_SIZE = 1024 * 1024
+
+
+def parse_stream(
+    fp: IO[str],
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[CodeBlock | Image | str]:
+    """Parse Markdown text read from a file object and yield elements.
+
+    Reads the text in chunks and parses it in segments split at blank
+    lines, so that only the current segment is kept in memory. A segment
+    ends at a blank line outside comments, code blocks, and images, and
+    before any comment or code block that is not closed yet. The elements
+    are the same as those of `parse`, except that an image cannot contain
+    a blank line.
+
+    Args:
+        fp (IO[str]): The file object to read from.
+        chunk_size (int): The number of characters to read at a time.
+
+    Yields:
+        CodeBlock | Image | str: Element instances or text segments.
+    """
+    text = ""
+    gap = ""  # The last text segment, continued by the next segment.
+    size = chunk_size
+
+    while chunk := fp.read(size):
+        text += chunk
+
+        if not (cut := _find_cut(text)):
+            size *= 2  # Read more at once to avoid parsing the text repeatedly.
+            continue
+
+        elems = list(parse(text[:cut]))
+        gap = _merge_gap(gap, elems)
+        yield from elems
+        text, size = text[cut:], chunk_size
+
+    elems = list(parse(text)) if text else []
+    if gap := _merge_gap(gap, elems):
+        elems.append(gap)
+
+    yield from elems
+
+
+def _merge_gap(gap: str, elems: list[CodeBlock | Image | str]) -> str:
+    """Prepend a text segment to the elements and remove the last one.
+
+    Args:
+        gap (str): The last text segment of the previous elements.
+        elems (list[CodeBlock | Image | str]): The elements to update in place.
+
+    Returns:
+        str: The last text segment of the elements, or an empty string.
+    """
+    if gap:
+        if elems and isinstance(elems[0], str):
+            elems[0] = f"{gap}{elems[0]}"
+        else:
+            elems.insert(0, gap)
+
+    if elems and isinstance(last := elems[-1], str):
+        elems.pop()
+        return last
+
+    return ""
+
+
+def _find_cut(text: str) -> int:
+    """Find the last blank line where the text can be split for parsing.
+
+    Args:
+        text (str): The Markdown text read so far.
+
+    Returns:
+        int: The position of the second newline of the blank line, or 0 if
+            the text cannot be split.
+    """
+    scanner = _Scanner(text, 0, len(text))
+    spans: list[tuple[int, int]] = []
+    end = 0
+
+    while comment := scanner.comment(end):
+        spans.append(comment)
+        end = comment[1]
+
+    # A comment or a code block may be closed by the text read later.
+    pin = text.find("<!--", end)
+    pin = len(text) if pin == -1 else pin
+
+    code_blocks = [(s, e, x) for s, e, x in Document.from_text(text).spans]
+    spans.extend((s, e) for s, e, _ in code_blocks)
+    spans.sort()
+
+    starts = [s for s, _, _ in code_blocks]
+    for start in _iter_fence_lines(text, end, pin):
+        k = bisect_right(starts, start) - 1
+        if k >= 0 and _is_closed(code_blocks[k], start):
+            continue
+
+        pin = start
+        break
+
+    index = bisect_right(spans, (pin, pin)) - 1
+    cut = text.rfind("\n\n", 0, pin) + 1
+
+    while cut and index >= 0 and cut < spans[index][1]:
+        if spans[index][0] < cut:
+            cut = text.rfind("\n\n", 0, spans[index][0]) + 1
+        index -= 1
+
+    return cut
+
+
+def _iter_fence_lines(text: str, pos: int, endpos: int) -> Iterator[int]:
+    if pos == 0 and FENCE_RUN_PATTERN.match(text, 0, endpos):
+        yield 0
+
+    for match in FENCE_LINE_PATTERN.finditer(text, pos, endpos):
+        yield match.start(1)
+
+
+def _is_closed(span: tuple[int, int, CodeBlock | Image], start: int) -> bool:
+    """Check if a fence line belongs to a code block that cannot change.
+
+    Args:
+        span (tuple[int, int, CodeBlock | Image]): The span of the last element
+            starting at or before the fence line.
+        start (int): The start of the fence line.
+
+    Returns:
+        bool: True if the fence line is in the body or the closing fence of
+            a code block, or opens a code block that the text read later
+            cannot extend.
+    """
+    first, end, elem = span
+    if not isinstance(elem, CodeBlock):
+        return False
+
+    if start > first:
+        return start < end
+
+    match = FENCE_RUN_PATTERN.match(elem.text)
+    return bool(match) and elem.text.endswith(f"\n{match.group()}")
+
+
+@dataclass
+class Document:
+    """A parsed Markdown document.
+
+    Holds the code blocks and images of a Markdown text together with their
+    spans, so that detecting the language and creating the notebook share a
+    single parse of the text. An index of the elements by identifier and
+    by type is built on first use, so that looking up an element does not
+    scan the document again.
+
+    Attributes:
+        text (str): The Markdown text.
+        spans (list[tuple[int, int, CodeBlock | Image]]): The code blocks and
+            images with their start and end positions in the text.
+        language (str): The detected language, or an empty string if not
+            detected.
+    """
+
+    text: str
+    spans: list[tuple[int, int, CodeBlock | Image]]
+    language: str
+    _index: _Index | None = field(default=None, init=False, repr=False, compare=False)
+
+    @classmethod
+    def from_text(cls, text: str) -> Self:
+        """Parse a Markdown text into a document.
+
+        Args:
+            text (str): The Markdown text.
+
+        Returns:
+            Self: The parsed document.
+        """
+        spans: list[tuple[int, int, CodeBlock | Image]] = []
+        cursor = 0
+
+        for elem in parse(text):
+            part = elem if isinstance(elem, str) else elem.text
+            start = text.find(part, cursor)
+            cursor = start + len(part)
+            if not isinstance(elem, str):
+                spans.append((start, cursor, elem))
+
+        language = _get_language(elem for _, _, elem in spans)
+        return cls(text, spans, language)
+
+    @property
+    def index(self) -> _Index:
+        """The index of the elements, built on first access."""
+        if self._index is None:
+            self._index = _Index.from_spans(self.spans)
+
+        return self._index
+
+    def get_code_block(self, identifier: str) -> CodeBlock | None:
+        """Get the first code block with an identifier.
+
+        Args:
+            identifier (str): The identifier of the code block.
+
+        Returns:
+            CodeBlock | None: The code block, or None if not found.
+        """
+        for k in self.index.identifiers.get(identifier, ()):
+            if isinstance(elem := self.spans[k][2], CodeBlock):
+                return elem
+
+        return None
+
+    def get_images(self, identifier: str) -> list[Image]:
+        """Get the images with an identifier.
+
+        Args:
+            identifier (str): The identifier of the images.
+
+        Returns:
+            list[Image]: The images in the order of the document.
+        """
+        spans = (self.spans[k] for k in self.index.identifiers.get(identifier, ()))
+        return [elem for _, _, elem in spans if isinstance(elem, Image)]
+
+    def iter_code_blocks(self) -> Iterator[CodeBlock]:
+        """Iterate over the code blocks.
+
+        Yields:
+            CodeBlock: The code blocks in the order of the document.
+        """
+        for k in self.index.code_blocks:
+            yield cast("CodeBlock", self.spans[k][2])
+
+    def iter_images(self) -> Iterator[Image]:
+        """Iterate over the images.
+
+        Yields:
+            Image: The images in the order of the document.
+        """
+        for k in self.index.images:
+            yield cast("Image", self.spans[k][2])
+
+    def copy(self) -> Self:
+        """Copy the document together with its elements.
+
+        Returns:
+            Self: The copied document.
+        """
+        spans = [(start, end, _copy_element(elem)) for start, end, elem in self.spans]
+        return type(self)(self.text, spans, self.language)
+
+    def get_span(self, elem: CodeBlock | Image) -> tuple[int, int]:
+        """Get the span of an element of the document.
+
+        Args:
+            elem (CodeBlock | Image): The element.
+
+        Returns:
+            tuple[int, int]: The start and end positions of the element.
+
+        Raises:
+            ValueError: If the element is not in the document.
+        """
+        if (k := self.index.positions.get(id(elem))) is None:
+            msg = "element not in document"
+            raise ValueError(msg)
+
+        return self.spans[k][:2]
+
+    def splice(self, edits: Iterable[tuple[CodeBlock | Image, str]]) -> str:
+        """Replace elements of the document with new text.
+
+        The new text is built in one pass from the spans of the elements,
+        without parsing the document again. A replacement takes the place
+        of the `text` of the element, which includes the indent of an image.
+
+        Args:
+            edits (Iterable[tuple[CodeBlock | Image, str]]): Pairs of an
+                element of the document and its replacement.
+
+        Returns:
+            str: The new text.
+
+        Raises:
+            ValueError: If an element is not in the document, or elements
+                are replaced more than once.
+        """
+        spans = sorted((*self.get_span(elem), text) for elem, text in edits)
+
+        parts: list[str] = []
+        cursor = 0
+
+        for start, end, text in spans:
+            if start < cursor:
+                msg = "element replaced more than once"
+                raise ValueError(msg)
+
+            parts.extend((self.text[cursor:start], text))
+            cursor = end
+
+        parts.append(self.text[cursor:])
+        return "".join(parts)
+
+
+@dataclass
+class _Index:
+    """The positions of the elements of a document in its spans.
+
+    Attributes:
+        identifiers (dict[str, list[int]]): The positions by identifier.
+        positions (dict[int, int]): The position by the id of an element.
+        code_blocks (list[int]): The positions of the code blocks.
+        images (list[int]): The positions of the images.
+    """
+
+    identifiers: dict[str, list[int]]
+    positions: dict[int, int]
+    code_blocks: list[int]
+    images: list[int]
+
+    @classmethod
+    def from_spans(cls, spans: list[tuple[int, int, CodeBlock | Image]]) -> Self:
+        index = cls({}, {}, [], [])
+
+        for k, (_, _, elem) in enumerate(spans):
+            if elem.identifier:
+                index.identifiers.setdefault(elem.identifier, []).append(k)
+            index.positions[id(elem)] = k
+            if isinstance(elem, CodeBlock):
+                index.code_blocks.append(k)
+            else:
+                index.images.append(k)
+
+        return index
+
+
+DOCUMENTS: LRUCache[bytes, Document] = LRUCache(maxsize=128)
+"""The most recently parsed documents, keyed by the digest of their text.
+
+Use `DOCUMENTS.resize`, `DOCUMENTS.clear`, and `DOCUMENTS.info` to configure,
+clear, and inspect the cache.
+"""
+
+
+def _copy_element(elem: CodeBlock | Image) -> CodeBlock | Image:
+    return replace(elem, classes=list(elem.classes), attributes=dict(elem.attributes))
+
+
+def parse_document(text: str) -> Document:
+    """Parse a Markdown text into a document.
+
+    The most recently parsed documents are cached by the digest of their
+    text, so that parsing the same text again does not scan it. The document
+    returned is a copy with its own elements, so that editing them does not
+    change the cached document used by `get_language` and `new_notebook`.
+
+    Args:
+        text (str): The Markdown text.
+
+    Returns:
+        Document: The parsed document.
+    """
+    return _parse_document(text).copy()
+
+
+def _parse_document(text: str) -> Document:
+    key = digest(text)
+    if document := DOCUMENTS.get(key):
+        return document
+
+    document = Document.from_text(text)
+    DOCUMENTS.set(key, document)
+    return document
+
+
 def get_language(text: str) -> str:
     """Get the language of a Markdown document.
 
@@ -496,10 +1337,14 @@ def get_language(text: str) -> str:
     Returns:
         str: The detected language, or "python" if not detected.
     """
+    return _parse_document(text).language
+
+
+def _get_language(elems: Iterable[CodeBlock | Image | str]) -> str:
     languages: dict[str, str] = {}
     identifiers: list[str] = []
 
-    for elem in parse(text):
+    for elem in elems:
         if isinstance(elem, CodeBlock) and elem.identifier and elem.classes:
             language = elem.classes[0].removeprefix(".")
             languages[elem.identifier] = language
@@ -553,19 +1398,272 @@ def new_notebook(text: str) -> NotebookNode:
     Returns:
         NotebookNode: The created notebook.
     """
-    language = get_language(text)
+    document = _parse_document(text)
+    return _new_notebook((elem for _, _, elem in document.spans), document.language)
+
+
+def new_notebook_from_stream(fp: IO[str], chunk_size: int = CHUNK_SIZE) -> NotebookNode:
+    """Create a new notebook from Markdown text read from a file object.
+
+    The text is parsed with `parse_stream`, so that only the code blocks
+    and images with identifiers are kept in memory.
+
+    Args:
+        fp (IO[str]): The file object to read from.
+        chunk_size (int): The number of characters to read at a time.
 
+    Returns:
+        NotebookNode: The created notebook.
+    """
+    elems = [
+        elem
+        for elem in parse_stream(fp, chunk_size)
+        if isinstance(elem, CodeBlock | Image) and elem.identifier
+    ]
+    return _new_notebook(elems, _get_language(elems))
+
+
+def _new_notebook(elems: Iterable[CodeBlock | Image], language: str) -> NotebookNode:
     if not language:
         msg = "language not found"
         raise ValueError(msg)
 
+    import nbformat
+
     node = nbformat.v4.new_notebook()
     node["metadata"]["language_info"] = {"name": language}
 
-    for code_block in parse(text):
+    for code_block in elems:
         if is_target_code_block(code_block, language):
             source = f"# #{code_block.identifier}\n{code_block.source}"
             cell = nbformat.v4.new_code_cell(source)
             node["cells"].append(cell)
 
     return node
+
+
+def update_text(text: str, nb: NotebookNode) -> str:
+    """Update Markdown text with the cells of a notebook.
+
+    The notebook must have been created from the text, with a cell for each
+    code block in the language of the document. Only the sources of the
+    code blocks whose cell has changed are replaced, keeping their fences
+    and attributes. The document of the new text is cached with the spans
+    of the old one shifted, so that it is not parsed again.
+
+    Args:
+        text (str): The Markdown text.
+        nb (NotebookNode): The notebook to write.
+
+    Returns:
+        str: The updated Markdown text.
+
+    Raises:
+        ValueError: If the cells do not match the code blocks of the text,
+            or a source cannot be written in its code block.
+    """
+    document = _parse_document(text)
+    language = document.language
+    code_blocks = [x for _, _, x in document.spans if is_target_code_block(x, language)]
+
+    if len(code_blocks) != len(nb["cells"]):
+        msg = "cells do not match the code blocks"
+        raise ValueError(msg)
+
+    edits: dict[int, str] = {}
+
+    for code_block, cell in zip(code_blocks, nb["cells"], strict=True):
+        prefix = f"# #{code_block.identifier}\n"
+        source: str = cell["source"]
+        if not source.startswith(prefix):
+            msg = f"cell does not match the code block: {code_block.identifier}"
+            raise ValueError(msg)
+
+        if (source := source.removeprefix(prefix)) != code_block.source:
+            edits[id(code_block)] = _replace_source(code_block, source)
+
+    if not edits:
+        return text
+
+    new = document.splice((x, edits[id(x)]) for x in code_blocks if id(x) in edits)
+    spans: list[tuple[int, int, CodeBlock | Image]] = []
+    delta = 0
+
+    for start, end, elem in document.spans:
+        if (replacement := edits.get(id(elem))) is None:
+            spans.append((start + delta, end + delta, elem))
+            continue
+
+        pos, endpos = start + delta, start + delta + len(replacement)
+        delta += len(replacement) - (end - start)
+        match = CodeBlock.pattern.match(new, pos, endpos)
+        if not match or match.end() != endpos:
+            msg = f"source cannot be written in the code block: {elem.identifier}"
+            raise ValueError(msg)
+
+        spans.append((pos, endpos, CodeBlock.from_match(match)))
+
+    DOCUMENTS.set(digest(new), Document(new, spans, language))
+    return new
+
+
+def _replace_source(code_block: CodeBlock, source: str) -> str:
+    """Replace the source of a code block, keeping its fences.
+
+    Args:
+        code_block (CodeBlock): The code block.
+        source (str): The new source.
+
+    Returns:
+        str: The new text of the code block.
+    """
+    head = code_block.text.split("\n", 1)[0]
+    tail = code_block.text.rsplit("\n", 1)[1]
+
+    if not source:
+        return f"{head}\n{tail}"
+
+    return f"{head}\n{textwrap.indent(source, code_block.indent)}\n{tail}"
+
+
+def _diff_lines(old: str, text: str) -> tuple[int, int]:
+    """Find the lines of the old text that differ from the new text.
+
+    Args:
+        old (str): The old text.
+        text (str): The new text.
+
+    Returns:
+        tuple[int, int]: The start and end positions of the changed lines
+            in the old text, including the trailing newline.
+    """
+    m, n = len(old), len(text)
+
+    lo, hi = 0, min(m, n)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[lo:mid] == text[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    prefix = lo
+
+    lo, hi = 0, min(m, n) - prefix
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[m - mid : m - lo] == text[n - mid : n - lo]:
+            lo = mid
+        else:
+            hi = mid - 1
+    suffix = lo
+
+    start = old.rfind("\n", 0, prefix) + 1
+    end = m - suffix
+
+    # The unchanged text can be kept as is if it starts a line in both texts.
+    chars = old[end - 1 : end], text[n - suffix - 1 : n - suffix]
+    if all(c in ("", "\n") for c in chars):
+        return start, end
+
+    end = old.find("\n", end)
+    return start, m if end == -1 else end + 1
+
+
+# Edits matching these patterns may change the structure of the document.
+CODE_EDIT_PATTERN = re.compile(r"^ *(?:```|~~~)|<!--|-->", re.MULTILINE)
+TEXT_EDIT_PATTERN = re.compile(r"^ *(?:```|~~~)|<!--|-->|[!`\[\](){}]", re.MULTILINE)
+
+
+def update_notebook(nb: NotebookNode, old: str, text: str) -> bool:
+    """Update a notebook in place after an edit of its Markdown text.
+
+    Compares the new text with the old one and re-parses only the code
+    block that contains the edited lines. The cells of other code blocks
+    are kept as the same objects. Edits that may change the structure of
+    the document, such as those touching fences, comments, or images, are
+    not handled here.
+
+    Args:
+        nb (NotebookNode): The notebook created from the old text.
+        old (str): The old Markdown text.
+        text (str): The new Markdown text.
+
+    Returns:
+        bool: True if the notebook has been updated, False if the new text
+            needs to be parsed from scratch.
+    """
+    if old == text:
+        return True
+
+    start, end = _diff_lines(old, text)
+    delta = len(text) - len(old)
+    document = _parse_document(old)
+    new = Document(text, document.spans.copy(), document.language)
+    spans = new.spans
+
+    k = bisect_right(spans, start, key=itemgetter(0)) - 1
+    inside = k >= 0 and start < spans[k][1]
+
+    pattern = CODE_EDIT_PATTERN if inside else TEXT_EDIT_PATTERN
+    if pattern.search(old, start, end) or pattern.search(text, start, end + delta):
+        return False
+
+    if inside:
+        if end > spans[k][1] or not _update_code_block(nb, new, k, delta):
+            return False
+
+    elif k + 1 < len(spans) and spans[k + 1][0] < end:
+        return False
+
+    spans[k + 1 :] = [(a + delta, b + delta, x) for a, b, x in spans[k + 1 :]]
+    DOCUMENTS.pop(digest(old))
+    DOCUMENTS.set(digest(text), new)
+    return True
+
+
+def _update_code_block(
+    nb: NotebookNode,
+    document: Document,
+    k: int,
+    delta: int,
+) -> bool:
+    """Parse the k-th code block again and update its cell and span.
+
+    Args:
+        nb (NotebookNode): The notebook to update.
+        document (Document): The document of the new text, with the spans
+            of the old text up to the k-th code block.
+        k (int): The index of the code block in the spans.
+        delta (int): The difference in length between the new and old text.
+
+    Returns:
+        bool: True if the code block and its cell have been updated.
+    """
+    import nbformat
+
+    text, spans, language = document.text, document.spans, document.language
+    start, end, elem = spans[k]
+    if not isinstance(elem, CodeBlock):
+        return False
+
+    match = CodeBlock.pattern.match(text, start, end + delta)
+    if not match or match.end() != end + delta:
+        return False
+
+    code_block = CodeBlock.from_match(match)
+
+    if is_target_code_block(code_block, language):
+        index = sum(is_target_code_block(x, language) for _, _, x in spans[:k])
+        if index >= len(nb["cells"]):
+            return False
+
+        cell = nb["cells"][index]
+        if not cell["source"].startswith(f"# #{code_block.identifier}\n"):
+            return False
+
+        source = f"# #{code_block.identifier}\n{code_block.source}"
+        if cell["source"] != source:
+            nb["cells"][index] = nbformat.v4.new_code_cell(source)
+
+    spans[k] = (start, end + delta, code_block)
+    return True
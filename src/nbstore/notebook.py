@@ -9,14 +9,16 @@ from __future__ import annotations
 
 import atexit
 import base64
+import hashlib
+import os
 import re
 import tempfile
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
-import nbformat
-
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+
     from nbformat import NotebookNode
 
 
@@ -248,11 +250,11 @@ def get_mime_content(
             return mime, text
 
     if text := data.get("application/pdf"):
-        return "application/pdf", base64.b64decode(text)
+        return "application/pdf", _decode(text)
 
     for mime, text in data.items():
         if mime.startswith("image/"):
-            return mime, base64.b64decode(text)
+            return mime, _decode(text)
 
     if "text/plain" in data:
         return "text/plain", data["text/plain"]
@@ -260,6 +262,146 @@ def get_mime_content(
     return "", ""
 
 
+SIDECAR_PREFIX = "nbstore-sidecar:"
+"""The prefix of output data that refers to a file in a sidecar directory."""
+
+
+def _decode(text: str) -> bytes:
+    """Decode binary output data, reading it from the sidecar if referenced.
+
+    Args:
+        text (str): The base64-encoded data or a sidecar reference.
+
+    Returns:
+        bytes: The decoded data.
+    """
+    if text.startswith(SIDECAR_PREFIX):
+        return Path(text.removeprefix(SIDECAR_PREFIX)).read_bytes()
+
+    return base64.b64decode(text)
+
+
+def _iter_binary_data(nb: NotebookNode) -> Iterator[tuple[dict[str, str], str]]:
+    """Iterate over the binary data of the outputs of a notebook.
+
+    Args:
+        nb (NotebookNode): The notebook to examine.
+
+    Yields:
+        tuple[dict[str, str], str]: The data dictionary and the MIME type of
+            each PDF or raster image output.
+    """
+    for cell in nb["cells"]:
+        for output in cell.get("outputs", []):
+            for mime in output.get("data", {}):
+                if mime == "application/pdf" or (
+                    mime.startswith("image/") and mime != "image/svg+xml"
+                ):
+                    yield output["data"], mime
+
+
+def externalize_outputs(nb: NotebookNode, directory: Path, size: int = 0) -> None:
+    """Move binary outputs of a notebook to a sidecar directory in place.
+
+    PDF and raster image outputs whose base64 text is longer than `size`
+    are decoded and written to the directory under the hash of their
+    content, and replaced by a reference to the file. `get_mime_content`
+    reads referenced files directly, without a base64 step.
+
+    Args:
+        nb (NotebookNode): The notebook to modify.
+        directory (Path): The sidecar directory.
+        size (int): The length above which outputs are moved.
+    """
+    from nbstore.store import write_bytes
+
+    for data, mime in _iter_binary_data(nb):
+        text = data[mime]
+        if text.startswith(SIDECAR_PREFIX) or len(text) <= size:
+            continue
+
+        content = base64.b64decode(text)
+        digest = hashlib.sha256(content).hexdigest()
+        path = directory / f"{digest}.{mime.split('/')[1]}"
+
+        if not path.exists():
+            directory.mkdir(parents=True, exist_ok=True)
+            write_bytes(path, content)
+
+        data[mime] = f"{SIDECAR_PREFIX}{path.absolute()}"
+
+
+def has_references(nb: NotebookNode) -> bool:
+    """Check whether a notebook has outputs in a sidecar directory.
+
+    Args:
+        nb (NotebookNode): The notebook to examine.
+
+    Returns:
+        bool: True if any output data is a sidecar reference.
+    """
+    return any(
+        data[mime].startswith(SIDECAR_PREFIX) for data, mime in _iter_binary_data(nb)
+    )
+
+
+def resolve_outputs(
+    nb: NotebookNode,
+    directory: Path,
+    *,
+    relative: bool = False,
+) -> None:
+    """Resolve the sidecar references of a notebook in place.
+
+    Files are referenced by a path relative to the directory of the notebook
+    file in notebook files, and by absolute path in memory.
+
+    Args:
+        nb (NotebookNode): The notebook to modify.
+        directory (Path): The directory of the notebook file.
+        relative (bool): Whether to make the references relative to the
+            directory instead of absolute.
+    """
+    directory = directory.absolute()
+
+    for data, mime in _iter_binary_data(nb):
+        text = data[mime]
+        if text.startswith(SIDECAR_PREFIX):
+            path = directory / text.removeprefix(SIDECAR_PREFIX)
+            if relative:
+                path = Path(os.path.relpath(path, directory)).as_posix()
+            data[mime] = f"{SIDECAR_PREFIX}{path}"
+
+
+def intern_outputs(nb: NotebookNode, outputs: dict[str, str]) -> set[str]:
+    """Share identical output data between notebooks in place.
+
+    Each string of output data is replaced by the equal string already in
+    `outputs`, keyed by the hash of its content, or added to it.
+
+    Args:
+        nb (NotebookNode): The notebook to modify.
+        outputs (dict[str, str]): The shared output data by content hash.
+
+    Returns:
+        set[str]: The content hashes of the output data of the notebook.
+    """
+    keys: set[str] = set()
+
+    for cell in nb["cells"]:
+        for output in cell.get("outputs", []):
+            data: dict[str, Any] = output.get("data", {})
+            for mime, text in data.items():
+                if not isinstance(text, str):
+                    continue
+
+                key = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+                data[mime] = outputs.setdefault(key, text)
+                keys.add(key)
+
+    return keys
+
+
 def add_data(nb: NotebookNode, identifier: str, mime: str, data: str) -> None:
     """Add data to a cell output by its identifier.
 
@@ -291,9 +433,32 @@ def new_code_cell(identifier: str, source: str) -> NotebookNode:
     if not source.startswith("#") or f"#{identifier}" not in source.split("\n", 1)[0]:
         source = f"# #{identifier}\n{source}"
 
+    import nbformat
+
     return nbformat.v4.new_code_cell(source)  # pyright: ignore[reportUnknownMemberType]
 
 
+def update_cells(nb: NotebookNode, other: NotebookNode) -> None:
+    """Replace the cells of a notebook with those of another in place.
+
+    Cells whose source is unchanged are kept as the same objects, so that
+    outputs and references held elsewhere remain valid.
+
+    Args:
+        nb (NotebookNode): The notebook to update.
+        other (NotebookNode): The notebook providing the new cells.
+    """
+    cells: dict[str, list[NotebookNode]] = {}
+    for cell in nb["cells"]:
+        cells.setdefault(cell["source"], []).append(cell)
+
+    nb["cells"] = [
+        cells[cell["source"]].pop(0) if cells.get(cell["source"]) else cell
+        for cell in other["cells"]
+    ]
+    nb["metadata"].update(other["metadata"])
+
+
 def execute(
     nb: NotebookNode,
     timeout: int = 600,
@@ -10,8 +10,6 @@ import re
 import textwrap
 from typing import TYPE_CHECKING
 
-import nbformat
-
 if TYPE_CHECKING:
     from collections.abc import Iterator
 
@@ -156,6 +154,8 @@ def new_notebook(text: str) -> NotebookNode:
     Returns:
         NotebookNode: The created notebook.
     """
+    import nbformat
+
     node = nbformat.v4.new_notebook()  # pyright: ignore[reportUnknownMemberType]
     node["metadata"]["language_info"] = {"name": "python"}
 
@@ -164,3 +164,145 @@ def new_notebook(text: str) -> NotebookNode:
         node["cells"].append(cell)
 
     return node
+
+
+def _find_source(text: str, source: str, pos: int) -> tuple[int, int, str]:
+    """Find a source yielded by `parse` in the text.
+
+    Sources of `if __name__ == "__main__":` blocks are dedented by `parse`,
+    so they are searched for with the indent of their first non-blank line.
+    Blank lines of a source match lines of whitespace only, which `parse`
+    turns into empty lines.
+
+    Args:
+        text (str): The text to search.
+        source (str): The source to find.
+        pos (int): The position to start the search from.
+
+    Returns:
+        tuple[int, int, str]: The start and end positions of the source in
+            the text, and its indent.
+
+    Raises:
+        ValueError: If the source is not found.
+    """
+    lines = source.split("\n")
+    k = next((k for k, line in enumerate(lines) if line.strip()), None)
+
+    if k is None:
+        return pos, pos, ""
+
+    # A lookahead, so that the search is tried from every line.
+    pattern = re.compile(
+        rf"^(?=(?:[^\n]*\n){{{k}}}([ \t]*){re.escape(lines[k])})",
+        re.MULTILINE,
+    )
+
+    for match in pattern.finditer(text, pos):
+        start, indent = match.start(), match.group(1)
+        if end := _match_lines(text, start, lines, indent):
+            return start, end, indent
+
+    msg = f"source not found: {lines[k]}"
+    raise ValueError(msg)
+
+
+def _match_lines(text: str, start: int, lines: list[str], indent: str) -> int | None:
+    """Match the lines of a source with the text from a position.
+
+    Args:
+        text (str): The text to match.
+        start (int): The start position of the first line in the text.
+        lines (list[str]): The lines of the source.
+        indent (str): The indent of the source in the text.
+
+    Returns:
+        int | None: The end position of the source in the text, or None if
+            the lines do not match.
+    """
+    cursor = start
+
+    for line in lines[:-1]:
+        end = text.find("\n", cursor)
+        if end == -1:
+            return None
+
+        row = text[cursor:end]
+        if (row != f"{indent}{line}") if line else row.strip():
+            return None
+
+        cursor = end + 1
+
+    end = text.find("\n", cursor)
+    row = text[cursor : len(text) if end == -1 else end]
+    last = f"{indent}{lines[-1]}"
+    return cursor + len(last) if row.rstrip() == last else None
+
+
+def _check_source(source: str, new: str, indent: str) -> None:
+    """Check that a new source keeps the cell structure of the code.
+
+    Args:
+        source (str): The source yielded by `parse`.
+        new (str): The new source of the cell.
+        indent (str): The indent of the source in the code.
+
+    Raises:
+        ValueError: If the source is empty, as its position in the code is
+            ambiguous, or if the new source changes the cell marker of the
+            source or would be split into other cells by `parse`.
+    """
+    if not source.strip():
+        msg = "cannot write a cell without source"
+        raise ValueError(msg)
+
+    first = source.split("\n", 1)[0]
+    lines = new.split("\n")
+    markers = [k for k, line in enumerate(lines) if CELL_PATTERN.match(line)]
+
+    if markers != ([0] if CELL_PATTERN.match(first) else []) or (
+        markers and lines[0] != first
+    ):
+        msg = f"cell does not match the source: {first}"
+        raise ValueError(msg)
+
+    if not indent and any(MAIN_PATTERN.match(line) for line in lines):
+        msg = f"cell cannot be written in the source: {first}"
+        raise ValueError(msg)
+
+
+def update_text(text: str, nb: NotebookNode) -> str:
+    """Update Python code with the cells of a notebook.
+
+    The notebook must have been created from the code, with a cell for each
+    source yielded by `parse`. Only the sources of the changed cells are
+    replaced, and the rest of the code is kept as is.
+
+    Args:
+        text (str): The Python code.
+        nb (NotebookNode): The notebook to write.
+
+    Returns:
+        str: The updated Python code.
+
+    Raises:
+        ValueError: If the cells do not match the sources of the code.
+    """
+    sources = list(parse(text))
+    if len(sources) != len(nb["cells"]):
+        msg = "cells do not match the sources"
+        raise ValueError(msg)
+
+    parts: list[str] = []
+    cursor = pos = 0
+
+    for source, cell in zip(sources, nb["cells"], strict=True):
+        start, pos, indent = _find_source(text, source, pos)
+        if (new := cell["source"]) != source:
+            _check_source(source, new, indent)
+            new = textwrap.indent(new, indent) if indent else new
+            parts.extend((text[cursor:start], new))
+            cursor = pos
+
+    parts.append(text[cursor:])
+    return "".join(parts)
@@ -0,0 +1,193 @@
+"""A matplotlib renderer that hashes what a figure draws.
+
+This module provides `HashRenderer`, which draws nothing but feeds every
+drawing operation of a figure to a hash: the path vertices and codes, the
+transforms, offsets and colors of collections, the text and fonts, the
+image data, and the graphics context of each operation, including the ids,
+URLs, clipping, and rasterization that change vector output. The hash is
+exact where a raster of the figure would miss changes smaller than a pixel.
+
+Text is measured with the Agg renderer, so that the layout of the figure
+is the same as when it is drawn with Agg.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
+import numpy as np
+from matplotlib.backend_bases import GraphicsContextBase, RendererBase
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.font_manager import FontProperties
+from matplotlib.path import Path
+from matplotlib.transforms import BboxBase, Transform
+
+if TYPE_CHECKING:
+    from hashlib import blake2b
+
+# pyright: reportIncompatibleMethodOverride=false
+# pyright: reportMissingParameterType=false
+# pyright: reportMissingTypeStubs=false
+# pyright: reportUnknownArgumentType=false
+# pyright: reportUnknownMemberType=false
+# pyright: reportUnknownParameterType=false
+# pyright: reportUnknownVariableType=false
+
+GC_PROPERTIES = (
+    "alpha",
+    "antialiased",
+    "capstyle",
+    "clip_path",
+    "clip_rectangle",
+    "dashes",
+    "forced_alpha",
+    "gid",
+    "hatch",
+    "hatch_color",
+    "hatch_linewidth",
+    "joinstyle",
+    "linewidth",
+    "rgb",
+    "sketch_params",
+    "snap",
+    "url",
+)
+"""The properties of a graphics context fed to the hash."""
+
+
+def _unpack(value: object) -> tuple[object, ...] | None:
+    """Get the values that represent a matplotlib object in the hash.
+
+    Args:
+        value (object): The object.
+
+    Returns:
+        tuple[object, ...] | None: The values, or None if the object is fed
+            by its representation.
+    """
+    if isinstance(value, Path):
+        return ("path", value.vertices, value.codes)
+    if isinstance(value, Transform):
+        frozen = None if value.is_affine else repr(value.frozen())
+        return ("transform", frozen, value.get_affine().get_matrix())
+    if isinstance(value, BboxBase):
+        return ("bbox", value.get_points())
+    if isinstance(value, GraphicsContextBase):
+        getters = [getattr(value, f"get_{name}", None) for name in GC_PROPERTIES]
+        return ("gc", *(getter() for getter in getters if getter))
+    if isinstance(value, FontProperties):
+        pattern = value.get_fontconfig_pattern()
+        return ("font", pattern, value.get_file(), value.get_math_fontfamily())
+    return None
+
+
+class HashRenderer(RendererBase):
+    """A renderer that feeds the drawing operations of a figure to a hash.
+
+    Attributes:
+        hash: The hash the drawing operations are fed to.
+    """
+
+    hash: blake2b
+    _agg: RendererAgg
+
+    def __init__(self, h: blake2b, width: float, height: float, dpi: float) -> None:
+        """Initialize a new HashRenderer instance.
+
+        Args:
+            h (blake2b): The hash to feed the drawing operations to.
+            width (float): The width of the canvas in pixels.
+            height (float): The height of the canvas in pixels.
+            dpi (float): The resolution of the canvas.
+        """
+        super().__init__()
+        self.hash = h
+        self._agg = RendererAgg(int(width), int(height), dpi)
+
+    def feed(self, *values: object) -> None:
+        """Feed values to the hash.
+
+        Arrays are fed by their content, paths by their vertices and codes,
+        transforms by their matrices, and graphics contexts and fonts by
+        their properties. Other values are fed by their representation.
+
+        Args:
+            *values (object): The values to feed.
+        """
+        for value in values:
+            if isinstance(value, np.ndarray):
+                self.hash.update(f"{value.dtype}{value.shape};".encode())
+                self.hash.update(np.ascontiguousarray(value).tobytes())
+            elif isinstance(value, np.generic):
+                self.feed(value.item())
+            elif isinstance(value, (list, tuple, Iterator)):
+                values = tuple(value)
+                self.feed(f"{type(value).__name__}{len(values)}", *values)
+            elif (unpacked := _unpack(value)) is not None:
+                self.feed(*unpacked)
+            else:
+                self.hash.update(f"{value!r};".encode())
+
+    def _record(
+        self,
+        name: str,
+        args: tuple[object, ...],
+        kwargs: dict[str, object],
+    ) -> None:
+        kwargs.pop("mtext", None)  # the Text artist, drawn through its other arguments
+        self.feed(name, *args, sorted(kwargs.items()))
+
+    def draw_path(self, *args, **kwargs) -> None:
+        self._record("draw_path", args, kwargs)
+
+    def draw_markers(self, *args, **kwargs) -> None:
+        self._record("draw_markers", args, kwargs)
+
+    def draw_path_collection(self, *args, **kwargs) -> None:
+        self._record("draw_path_collection", args, kwargs)
+
+    def draw_quad_mesh(self, *args, **kwargs) -> None:
+        self._record("draw_quad_mesh", args, kwargs)
+
+    def draw_gouraud_triangles(self, *args, **kwargs) -> None:
+        self._record("draw_gouraud_triangles", args, kwargs)
+
+    def draw_image(self, *args, **kwargs) -> None:
+        self._record("draw_image", args, kwargs)
+
+    def draw_text(self, *args, **kwargs) -> None:
+        self._record("draw_text", args, kwargs)
+
+    def draw_tex(self, *args, **kwargs) -> None:
+        self._record("draw_tex", args, kwargs)
+
+    def open_group(self, *args, **kwargs) -> None:
+        self._record("open_group", args, kwargs)
+
+    def close_group(self, *args, **kwargs) -> None:
+        self._record("close_group", args, kwargs)
+
+    def start_rasterizing(self) -> None:
+        self.feed("start_rasterizing")
+
+    def stop_rasterizing(self) -> None:
+        self.feed("stop_rasterizing")
+
+    def start_filter(self) -> None:
+        self.feed("start_filter")
+
+    def stop_filter(self, filter_func) -> None:
+        self.feed("stop_filter", getattr(filter_func, "__qualname__", filter_func))
+
+    def flipy(self) -> bool:
+        return self._agg.flipy()
+
+    def get_canvas_width_height(self) -> tuple[float, float]:
+        return self._agg.get_canvas_width_height()
+
+    def get_text_width_height_descent(self, s, prop, ismath):
+        return self._agg.get_text_width_height_descent(s, prop, ismath)
+
+    def points_to_pixels(self, points):
+        return self._agg.points_to_pixels(points)
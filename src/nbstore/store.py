@@ -6,20 +6,45 @@ from various file formats and managing notebook instances in memory.
 
 from __future__ import annotations
 
+import atexit
+import copy
+import os
+import stat
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import TYPE_CHECKING
-
-import nbformat
+from typing import TYPE_CHECKING, cast
 
 import nbstore.markdown
+import nbstore.notebook
 import nbstore.python
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
+    from types import TracebackType
+    from typing import Self
 
     from nbformat import NotebookNode
 
 
+@dataclass
+class InternStats:
+    """Statistics of the output data shared between notebooks.
+
+    The number of distinct strings is the length of `Store.outputs`.
+
+    Attributes:
+        shared (int): The number of strings of a notebook that are equal to
+            one of another notebook and held only once.
+        saved (int): The total length of the strings held only once.
+    """
+
+    shared: int = 0
+    saved: int = 0
+
+
 class Store:
     """Manage notebook files from one or more source directories.
 
@@ -27,25 +52,93 @@ class Store:
     their content for efficient access. Automatically reloads files when
     they have been modified on disk.
 
+    In incremental mode, a modified .py or .md file updates the cached
+    notebook node in place: only the edited part of the text is parsed
+    again, and the cells that have not changed are kept as the same objects.
+
+    With a sidecar directory, binary outputs of .ipynb files larger than
+    `SIDECAR_SIZE` are written to the directory on `write`, and the notebook
+    file only keeps references to them, relative to the notebook file. The
+    notebook node passed to `write` keeps its outputs.
+
+    With interning, identical output data of all the notebooks read share
+    one string object, keyed by content hash in `outputs`. The output data
+    of a notebook read again replace its previous ones, which are dropped
+    once no other notebook uses them.
+
+    With a write delay, `write` only records the notebook node as dirty and
+    returns. A background thread writes the dirty notebooks once no write
+    has been requested for `delay` seconds, so that repeated writes of the
+    same notebook are coalesced into one. Pending writes are also done by
+    `flush` and at exit, and a failed write is retried after the delay.
+    Notebook nodes should not be modified while they are being written.
+    Call `close`, or use the store as a context manager, to write the dirty
+    notebooks and stop the background thread.
+
     Attributes:
         src_dirs: List of source directories to search for notebook files.
         nodes: Dictionary mapping file paths to their notebook nodes.
         st_mtime: Dictionary mapping file paths to their last modification times.
+        texts: Dictionary mapping .py and .md file paths to their last read text
+            in incremental mode.
         url: String representing the last accessed URL.
+        incremental: Whether to update notebook nodes incrementally.
+        sidecar: The directory for binary outputs, relative to each notebook
+            file, or None to keep them in the notebook files.
+        intern: Whether to share identical output data between notebooks.
+        outputs: Dictionary mapping content hashes to shared output data.
+        stats: Statistics of the output data shared between notebooks.
+        delay: The delay in seconds before dirty notebooks are written, or
+            None to write them immediately.
+        dirty: Dictionary mapping file paths to notebook nodes waiting to be
+            written.
     """
 
     src_dirs: list[Path]
     nodes: dict[Path, NotebookNode]
     st_mtime: dict[Path, float]
+    texts: dict[Path, str]
     url: str
-
-    def __init__(self, src_dirs: str | Path | Iterable[str | Path]) -> None:
+    incremental: bool
+    sidecar: Path | None
+    intern: bool
+    outputs: dict[str, str]
+    delay: float | None
+    dirty: dict[Path, NotebookNode]
+    _condition: threading.Condition
+    _flush_lock: threading.Lock
+    _deadline: float
+    _thread: threading.Thread | None
+    _closed: bool
+    _error: BaseException | None
+    _references: dict[str, set[Path]]
+    _keys: dict[Path, set[str]]
+
+    def __init__(
+        self,
+        src_dirs: str | Path | Iterable[str | Path],
+        *,
+        incremental: bool = False,
+        sidecar: str | Path | None = None,
+        intern: bool = False,
+        delay: float | None = None,
+    ) -> None:
         """Initialize a new Store instance.
 
         Args:
             src_dirs (str | Path | Iterable[str | Path]): One or more directories
                 to search for notebook files. Can be a single path or a collection
                 of paths.
+            incremental (bool): Whether to update the notebook nodes of modified
+                .py and .md files in place instead of reading them from scratch.
+            sidecar (str | Path | None): The directory for binary outputs,
+                relative to each notebook file, or None to keep them in the
+                notebook files.
+            intern (bool): Whether to share identical output data between
+                notebooks.
+            delay (float | None): The delay in seconds before dirty notebooks
+                are written in the background, or None to write them
+                immediately.
         """
         if isinstance(src_dirs, (str, Path)):
             src_dirs = [src_dirs]
@@ -53,7 +146,33 @@ class Store:
         self.src_dirs = [Path(src_dir) for src_dir in src_dirs]
         self.nodes = {}
         self.st_mtime = {}
+        self.texts = {}
         self.url = ""
+        self.incremental = incremental
+        self.sidecar = Path(sidecar) if sidecar is not None else None
+        self.intern = intern
+        self.outputs = {}
+        self.delay = delay
+        self.dirty = {}
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._deadline = 0
+        self._thread = None
+        self._closed = False
+        self._error = None
+        self._references = {}
+        self._keys = {}
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
 
     def find_path(self, url: str) -> Path:
         """Find the absolute path of a notebook file.
@@ -99,15 +218,96 @@ class Store:
         st_mtime = path.stat().st_mtime
 
         if self.st_mtime.get(path) != st_mtime:
-            self.nodes[path] = read(path)
+            nb = self._update(path) if self.incremental else read(path)
+            if self.intern:
+                self._intern(path, nb)
+            self.nodes[path] = nb
             self.st_mtime[path] = st_mtime
 
         return self.nodes[path]
 
+    @property
+    def stats(self) -> InternStats:
+        """Statistics of the output data shared between notebooks."""
+        stats = InternStats()
+
+        for key, paths in self._references.items():
+            stats.shared += len(paths) - 1
+            stats.saved += (len(paths) - 1) * len(self.outputs[key])
+
+        return stats
+
+    def _intern(self, path: Path, nb: NotebookNode) -> None:
+        """Share the output data of a notebook with the other notebooks.
+
+        Args:
+            path (Path): The path to the notebook file.
+            nb (NotebookNode): The notebook to modify.
+        """
+        self._release(path)
+        keys = self._keys[path] = nbstore.notebook.intern_outputs(nb, self.outputs)
+
+        for key in keys:
+            self._references.setdefault(key, set()).add(path)
+
+    def _release(self, path: Path) -> None:
+        """Drop the output data of a notebook not used by other notebooks.
+
+        Args:
+            path (Path): The path to the notebook file.
+        """
+        for key in self._keys.pop(path, ()):
+            paths = self._references[key]
+            paths.discard(path)
+            if not paths:
+                del self._references[key]
+                del self.outputs[key]
+
+    def _update(self, path: Path) -> NotebookNode:
+        """Read a notebook file, updating the cached notebook node in place.
+
+        Args:
+            path (Path): The path to the notebook file.
+
+        Returns:
+            NotebookNode: The notebook content.
+        """
+        if path.suffix not in (".py", ".md"):
+            return read(path)
+
+        text = path.read_text()
+        old = self.texts.get(path)
+        self.texts[path] = text
+
+        module = nbstore.python if path.suffix == ".py" else nbstore.markdown
+
+        if old is None or (nb := self.nodes.get(path)) is None:
+            return module.new_notebook(text)
+
+        if path.suffix == ".md" and nbstore.markdown.update_notebook(nb, old, text):
+            return nb
+
+        nbstore.notebook.update_cells(nb, module.new_notebook(text))
+        return nb
+
     def write(self, url: str, notebook_node: NotebookNode) -> None:
         """Write a notebook node to a file.
 
-        Currently only supports writing to .ipynb files.
+        Supports .ipynb, .py, and .md files. With a sidecar directory, large
+        binary outputs of the notebook node are moved to the directory and
+        replaced by references in place.
+
+        A .py or .md file must have been read into the notebook node. Only
+        the sources of its changed cells are spliced into the text of the
+        file, which is otherwise kept as is.
+
+        The file is replaced atomically, so that an interrupted write never
+        leaves a truncated file, and is left untouched if its content is
+        unchanged. The notebook node is cached as the content of the file,
+        so that reading it again does not parse the file.
+
+        With a write delay, the notebook node is only marked as dirty and
+        written later in the background.
 
         Args:
             url (str): The URL or relative path of the notebook file.
@@ -115,21 +315,211 @@ class Store:
 
         Raises:
             NotImplementedError: If the file format is not supported for writing.
+            ValueError: If the cells of the notebook node do not match the
+                text of a .py or .md file.
         """
         url = url or self.url
 
         path = self.find_path(url)
 
-        if path.suffix == ".ipynb":
-            return nbformat.write(notebook_node, path)  # pyright: ignore[reportUnknownMemberType]
+        if path.suffix not in (".ipynb", ".py", ".md"):
+            raise NotImplementedError
+
+        if self.delay is None:
+            self._write(path, notebook_node)
+            return
+
+        with self._condition:
+            self.nodes[path] = notebook_node
+            if path.exists():
+                self.st_mtime[path] = path.stat().st_mtime
+            self.dirty[path] = notebook_node
+            self._deadline = time.monotonic() + self.delay
+            self._condition.notify()
+
+        if self._thread is None:
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def close(self) -> None:
+        """Write the dirty notebooks and stop the background thread.
 
-        raise NotImplementedError
+        The store can still be used afterwards: a delayed write starts the
+        background thread again.
+
+        Raises:
+            BaseException: The error raised by a write, if any.
+        """
+        if thread := self._thread:
+            with self._condition:
+                self._closed = True
+                self._condition.notify()
+
+            thread.join()
+            self._thread = None
+            atexit.unregister(self.flush)
+
+        self.flush()
+
+    def flush(self) -> None:
+        """Write the dirty notebooks now.
+
+        A notebook that fails to be written stays dirty, so that it is
+        written again by the next flush.
+
+        Raises:
+            BaseException: The first error raised by a write, or else the
+                error raised by a write in the background since the last
+                flush, if any.
+        """
+        error = None
+
+        with self._flush_lock:
+            with self._condition:
+                dirty = list(self.dirty.items())
+
+            for path, notebook_node in dirty:
+                try:
+                    self._write(path, notebook_node)
+                except Exception as e:  # noqa: BLE001, PERF203
+                    error = error or e
+
+        if error is None:
+            error, self._error = self._error, None
+
+        if error:
+            raise error
+
+    def _run(self) -> None:
+        """Write the dirty notebooks once the write delay has passed."""
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if not self.dirty:
+                        self._condition.wait()
+                    elif (timeout := self._deadline - time.monotonic()) > 0:
+                        self._condition.wait(timeout)
+                    else:
+                        break
+
+                if self._closed:
+                    return
+
+            try:
+                self.flush()
+            except Exception as e:  # noqa: BLE001
+                self._error = e
+                with self._condition:
+                    self._deadline = time.monotonic() + (self.delay or 0)
+
+    def _write(self, path: Path, notebook_node: NotebookNode) -> None:
+        """Write a notebook node to a file and cache it.
+
+        The notebook node is removed from the dirty notebooks and cached
+        unless a newer one has been written in the meantime.
+
+        Args:
+            path (Path): The path to the notebook file.
+            notebook_node (NotebookNode): The notebook content to write.
+        """
+        if path.suffix in (".py", ".md"):
+            module = nbstore.python if path.suffix == ".py" else nbstore.markdown
+            text = module.update_text(path.read_text(), notebook_node)
+
+        else:
+            import nbformat
+
+            node = notebook_node
+            if self.sidecar is not None or nbstore.notebook.has_references(node):
+                node = copy.deepcopy(node)
+                if self.sidecar is not None:
+                    directory = path.parent / self.sidecar
+                    nbstore.notebook.externalize_outputs(node, directory, SIDECAR_SIZE)
+                nbstore.notebook.resolve_outputs(node, path.parent, relative=True)
+
+            text = nbformat.writes(node)  # pyright: ignore[reportUnknownMemberType]
+            if not text.endswith("\n"):
+                text += "\n"
+
+        write_text(path, text)
+
+        with self._condition:
+            if (dirty := self.dirty.get(path)) is notebook_node:
+                del self.dirty[path]
+            if dirty is None or dirty is notebook_node:
+                self.nodes[path] = notebook_node
+            self.st_mtime[path] = path.stat().st_mtime
+            if self.incremental and path.suffix in (".py", ".md"):
+                self.texts[path] = text
+
+
+STREAM_SIZE = 64 * 1024 * 1024
+"""The size in bytes above which .md files are parsed while being read."""
+
+SIDECAR_SIZE = 16 * 1024
+"""The length of base64 text above which binary outputs go to the sidecar."""
+
+
+def write_text(path: Path, text: str) -> bool:
+    """Write text to a file atomically, unless the file already contains it.
+
+    The mode of an existing file is kept.
+
+    Args:
+        path (Path): The path to the file.
+        text (str): The text to write.
+
+    Returns:
+        bool: True if the file was written, False if it was unchanged.
+    """
+    data = text.encode()
+
+    if not path.exists():
+        write_bytes(path, data)
+        return True
+
+    if path.stat().st_size == len(data) and path.read_bytes() == data:
+        return False
+
+    write_bytes(path, data, stat.S_IMODE(path.stat().st_mode))
+    return True
+
+
+def write_bytes(path: Path, data: bytes, mode: int = 0o644) -> None:
+    """Write data to a file atomically.
+
+    The data is written to a temporary file in the same directory, flushed
+    to disk, and renamed over the file, so that readers see either the old
+    or the new content in full. The temporary file is removed if writing
+    fails.
+
+    Args:
+        path (Path): The path to the file.
+        data (bytes): The data to write.
+        mode (int): The permission bits of the file.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        Path(tmp).chmod(mode)
+        Path(tmp).replace(path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
 
 
 def read(path: str | Path) -> NotebookNode:
     """Read a notebook file and return its content.
 
-    Supports .ipynb, .py, and .md file formats.
+    Supports .ipynb, .py, and .md file formats. Markdown files larger than
+    `STREAM_SIZE` are read in chunks with bounded memory. The sidecar
+    references of .ipynb files are resolved against the directory of the
+    file.
 
     Args:
         path (str | Path): The path to the notebook file.
@@ -143,7 +533,15 @@ def read(path: str | Path) -> NotebookNode:
     path = Path(path)
 
     if path.suffix == ".ipynb":
-        return nbformat.read(path, as_version=4)  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+        import nbformat
+
+        nb = cast("NotebookNode", nbformat.read(path, as_version=4))  # pyright: ignore[reportUnknownMemberType]
+        nbstore.notebook.resolve_outputs(nb, path.parent)
+        return nb
+
+    if path.suffix == ".md" and path.stat().st_size > STREAM_SIZE:
+        with path.open() as fp:
+            return nbstore.markdown.new_notebook_from_stream(fp)
 
     text = path.read_text()
 
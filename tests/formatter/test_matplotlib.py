@@ -1,5 +1,6 @@
 import base64
 import io
+from pathlib import Path
 
 import matplotlib.pyplot as plt
 import pytest
@@ -36,6 +37,23 @@ def test_pgf(fig: Figure):
     assert text.endswith("\\endgroup%\n")
 
 
+def test_pgf_scratch_directory(fig: Figure):
+    from nbstore.formatter import get_scratch_directory
+
+    function = get_func("pgf")
+    for _ in range(2):
+        function(fig, RepresentationPrinter(io.StringIO()), None)
+    assert not list(get_scratch_directory().iterdir())
+
+
+def test_scratch_directory():
+    from nbstore.formatter import get_scratch_directory
+
+    directory = get_scratch_directory()
+    assert directory.is_dir()
+    assert get_scratch_directory() is directory
+
+
 def test_pdf(fig: Figure):
     function = get_func("pdf")
     data = function(fig)
@@ -81,3 +99,387 @@ def test_set_formatter_svg():
     assert isinstance(formatter, SVGFormatter)
     func = formatter.lookup_by_type("matplotlib.figure.Figure")
     assert func is matplotlib_figure_to_svg
+
+
+@pytest.fixture
+def render_cache(tmp_path: Path):
+    from nbstore.formatter import set_render_cache
+
+    set_render_cache(tmp_path)
+    yield tmp_path
+    set_render_cache(None)
+
+
+def test_render_cache(fig: Figure, render_cache: Path):
+    from nbstore.formatter import fingerprint, matplotlib_figure_to_svg
+
+    xml = matplotlib_figure_to_svg(fig)
+    path = render_cache / f"{fingerprint(fig, 'svg')}.svg"
+    assert path.read_text() == xml
+    path.write_text("cached")
+    assert matplotlib_figure_to_svg(fig) == "cached"
+
+
+def test_render_cache_pdf(fig: Figure, render_cache: Path):
+    from nbstore.formatter import matplotlib_figure_to_pdf
+
+    data = matplotlib_figure_to_pdf(fig)
+    assert matplotlib_figure_to_pdf(fig) == data
+    assert len(list(render_cache.glob("*.pdf"))) == 1
+
+
+def test_fingerprint():
+    from nbstore.formatter import fingerprint
+
+    def create(y: int) -> Figure:
+        fig, ax = plt.subplots()
+        ax.plot([0, 1], [0, y])
+        return fig
+
+    a, b, c = create(1), create(1), create(2)
+    canvas = a.canvas
+    assert fingerprint(a, "svg") == fingerprint(b, "svg")
+    assert fingerprint(a, "svg") != fingerprint(a, "pdf")
+    assert fingerprint(a, "svg") != fingerprint(c, "svg")
+    assert a.canvas is canvas
+
+
+def test_fingerprint_non_visual():
+    import matplotlib as mpl
+
+    from nbstore.formatter import fingerprint
+
+    fig, ax = plt.subplots()
+    ax.plot([0, 1], [0, 1])
+    key = fingerprint(fig, "svg")
+    (line,) = fig.axes[0].get_lines()
+    line.set_gid("line")
+    assert fingerprint(fig, "svg") != key
+    key = fingerprint(fig, "svg")
+    line.set_url("https://example.com")
+    assert fingerprint(fig, "svg") != key
+    key = fingerprint(fig, "svg")
+    with mpl.rc_context({"svg.fonttype": "none"}):
+        assert fingerprint(fig, "svg") != key
+    with mpl.rc_context({"svg.hashsalt": "salt"}):
+        assert fingerprint(fig, "svg") != key
+
+
+def test_render_cache_sub_pixel(deterministic, render_cache: Path):
+    from nbstore.formatter import matplotlib_figure_to_svg, set_render_cache
+
+    def create(y: float) -> Figure:
+        fig, ax = plt.subplots()
+        ax.plot([0, 1, 2], [0, y, 2])
+        return fig
+
+    a = matplotlib_figure_to_svg(create(1))
+    b = matplotlib_figure_to_svg(create(1.000001))
+    assert a != b
+    assert len(list(render_cache.glob("*.svg"))) == 2
+    set_render_cache(None)
+    assert matplotlib_figure_to_svg(create(1.000001)) == b
+
+
+def test_render_cache_gid(render_cache: Path):
+    from nbstore.formatter import matplotlib_figure_to_svg
+
+    fig, ax = plt.subplots()
+    ax.plot([0, 1], [0, 1])
+    assert 'id="line"' not in matplotlib_figure_to_svg(fig)
+    fig.axes[0].get_lines()[0].set_gid("line")
+    assert 'id="line"' in matplotlib_figure_to_svg(fig)
+
+
+def test_mimebundle(fig: Figure):
+    from nbstore.formatter import matplotlib_figure_to_mimebundle
+
+    bundle, metadata = matplotlib_figure_to_mimebundle(fig, ["pdf", "svg"])
+    assert not metadata
+    assert isinstance(bundle["application/pdf"], bytes)
+    assert isinstance(bundle["image/svg+xml"], str)
+    assert bundle["image/svg+xml"].startswith('<?xml version="1.0"')
+
+
+def test_mimebundle_single(deterministic):
+    from nbstore.formatter import (
+        matplotlib_figure_to_mimebundle,
+        matplotlib_figure_to_pdf,
+        matplotlib_figure_to_svg,
+    )
+
+    fig, ax = plt.subplots()
+    ax.scatter(range(100), range(100))
+    ax.set(xlabel="x label", ylabel="y label", title="title")
+    bundle, _ = matplotlib_figure_to_mimebundle(fig, ["pdf", "svg"])
+    assert bundle["application/pdf"] == matplotlib_figure_to_pdf(fig)
+    assert bundle["image/svg+xml"] == matplotlib_figure_to_svg(fig)
+
+
+def test_set_formatter_multiple(fig: Figure):
+    from nbstore.formatter import set_formatter
+
+    ip = InteractiveShell()
+    set_formatter("matplotlib", ["pdf", "svg"], ip)
+    data, _ = ip.display_formatter.format(fig)  # type:ignore
+    assert data["application/pdf"].startswith(b"%PDF")
+    assert data["image/svg+xml"].startswith('<?xml version="1.0"')
+
+
+def test_set_formatter_error():
+    from nbstore.formatter import set_formatter
+
+    with pytest.raises(NotImplementedError):
+        set_formatter("matplotlib", ["pdf", "jpg"], InteractiveShell())
+
+
+@pytest.fixture
+def deterministic():
+    from nbstore.formatter import set_deterministic
+
+    set_deterministic()
+    yield
+    set_deterministic(False)
+
+
+def _render_at(epoch: int, monkeypatch: pytest.MonkeyPatch) -> tuple[bytes, str]:
+    from nbstore.formatter import matplotlib_figure_to_pdf, matplotlib_figure_to_svg
+
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", str(epoch))
+    fig, ax = plt.subplots()
+    ax.plot([0, 1], [0, 1])
+    svg = matplotlib_figure_to_svg(fig)
+    assert isinstance(svg, str)
+    return matplotlib_figure_to_pdf(fig), svg
+
+
+def test_deterministic(deterministic, monkeypatch: pytest.MonkeyPatch):
+    assert _render_at(0, monkeypatch) == _render_at(86400, monkeypatch)
+
+
+def test_deterministic_disabled(monkeypatch: pytest.MonkeyPatch):
+    pdf_a, svg_a = _render_at(0, monkeypatch)
+    pdf_b, svg_b = _render_at(86400, monkeypatch)
+    assert pdf_a != pdf_b
+    assert svg_a != svg_b
+
+
+def test_set_deterministic_false():
+    import matplotlib as mpl
+
+    from nbstore.formatter import METADATA, set_deterministic
+
+    set_deterministic()
+    assert METADATA["pdf"] == {"CreationDate": None}
+    set_deterministic(False)
+    assert METADATA == {"pdf": {}, "svg": {}}
+    assert mpl.rcParams["svg.hashsalt"] is None
+
+
+def test_set_deterministic_restore():
+    import matplotlib as mpl
+
+    from nbstore.formatter import METADATA, set_deterministic
+
+    with mpl.rc_context({"svg.hashsalt": "user"}):
+        METADATA["svg"]["Date"] = "2000-01-01"
+        try:
+            set_deterministic()
+            set_deterministic()
+            assert mpl.rcParams["svg.hashsalt"] == "nbstore"
+            assert METADATA["svg"] == {"Date": None}
+            set_deterministic(False)
+            assert mpl.rcParams["svg.hashsalt"] == "user"
+            assert METADATA["svg"] == {"Date": "2000-01-01"}
+            set_deterministic(False)
+            assert mpl.rcParams["svg.hashsalt"] == "user"
+        finally:
+            METADATA["svg"].clear()
+
+
+def test_set_formatter_deterministic(deterministic):
+    from nbstore.formatter import METADATA, set_deterministic, set_formatter
+
+    set_deterministic(False)
+    set_formatter("matplotlib", "svg", InteractiveShell(), deterministic=True)
+    assert METADATA["svg"] == {"Date": None}
+
+
+def test_minify_svg(fig: Figure):
+    import xml.etree.ElementTree as ET
+
+    from nbstore.formatter import matplotlib_figure_to_svg, minify_svg
+
+    xml = matplotlib_figure_to_svg(fig)
+    assert isinstance(xml, str)
+    minified = minify_svg(xml)
+    assert len(minified) < len(xml)
+    ET.fromstring(minified.encode())
+
+
+@pytest.mark.parametrize(
+    ("xml", "expected", "precision"),
+    [
+        (
+            '<path d="M 1.23456 -0.0001 \nL 10.50 2"/>',
+            '<path d="M 1.23 0 L 10.5 2"/>',
+            2,
+        ),
+        ('<path d="M 1.23456 -0.0001 \nL 10.50 2"/>', '<path d="M 1 0 L 10 2"/>', 0),
+        ('<use x="1.234567" y="20"/>', '<use x="1.23" y="20"/>', 2),
+        ("<g>\n  <g>\n  </g>\n</g>", "<g>\n<g>\n</g>\n</g>", 2),
+    ],
+)
+def test_minify_svg_numbers(xml: str, expected: str, precision: int):
+    from nbstore.formatter import minify_svg
+
+    assert minify_svg(xml, precision) == expected
+
+
+def test_minify_svg_dedupe():
+    from nbstore.formatter import minify_svg
+
+    xml = (
+        '<defs><path id="a" d="M 0 0"/></defs><defs><path id="b" d="M 0 0"/></defs>'
+        '<use xlink:href="#b"/><g clip-path="url(#b)" style="fill: #ffffff"/>'
+    )
+    expected = (
+        '<defs><path id="a" d="M 0 0"/></defs>'
+        '<use xlink:href="#a"/><g clip-path="url(#a)" style="fill: #ffffff"/>'
+    )
+    assert minify_svg(xml) == expected
+
+
+def test_minify_svg_raster(tmp_path: Path):
+    from nbstore.formatter import minify_svg
+
+    data = base64.b64encode(b"png").decode()
+    xml = f'<image xlink:href="data:image/png;base64,\n{data}"/>'
+    minified = minify_svg(xml, directory=tmp_path, base_url="images")
+    (path,) = tmp_path.iterdir()
+    assert path.read_bytes() == b"png"
+    assert minified == f'<image xlink:href="images/{path.name}"/>'
+    minified = minify_svg(xml + xml, directory=tmp_path, base_url="images/")
+    assert minified.count(f"images/{path.name}") == 2
+
+
+def test_minify_svg_raster_saved_elsewhere(tmp_path: Path):
+    from urllib.parse import urljoin
+
+    from nbstore.formatter import minify_svg
+
+    data = base64.b64encode(b"png").decode()
+    xml = f'<image xlink:href="data:image/png;base64,{data}"/>'
+    svg = tmp_path / "docs" / "fig.svg"
+    svg.parent.mkdir()
+    minified = minify_svg(xml, directory=tmp_path / "images", base_url="../images")
+    svg.write_text(minified)
+    href = svg.read_text().split('"')[1]
+    url = urljoin(svg.absolute().as_uri(), href)
+    assert Path(url.removeprefix("file://")).read_bytes() == b"png"
+
+
+def test_minify_svg_raster_base_url_required(tmp_path: Path):
+    from nbstore.formatter import minify_svg, set_svg_minify
+
+    with pytest.raises(ValueError, match="base_url is required"):
+        minify_svg("<svg/>", directory=tmp_path)
+    with pytest.raises(ValueError, match="base_url is required"):
+        set_svg_minify(directory=tmp_path)
+
+
+@pytest.fixture
+def svg_minify():
+    from nbstore.formatter import set_svg_minify
+
+    set_svg_minify()
+    yield
+    set_svg_minify(False)
+
+
+def test_set_svg_minify(fig: Figure, svg_minify):
+    from nbstore.formatter import set_formatter
+
+    ip = InteractiveShell()
+    set_formatter("matplotlib", "svg", ip)
+    data, metadata = ip.display_formatter.format(fig)  # type:ignore
+    assert data["image/svg+xml"].startswith('<?xml version="1.0"')
+    sizes = metadata["image/svg+xml"]["minify"]
+    assert sizes["after"] == len(data["image/svg+xml"].encode())
+    assert sizes["before"] > sizes["after"]
+
+
+def test_set_svg_minify_multiple(fig: Figure, svg_minify):
+    from nbstore.formatter import set_formatter
+
+    ip = InteractiveShell()
+    set_formatter("matplotlib", ["pdf", "svg"], ip)
+    data, metadata = ip.display_formatter.format(fig)  # type:ignore
+    assert data["application/pdf"].startswith(b"%PDF")
+    assert "minify" in metadata["image/svg+xml"]
+
+
+@pytest.fixture
+def raster_options():
+    from nbstore.formatter import set_raster_options
+
+    yield set_raster_options
+    set_raster_options()
+
+
+def test_png(fig: Figure):
+    data = get_func("png")(fig)
+    assert data.startswith(b"\x89PNG")
+
+
+def test_webp(fig: Figure):
+    data = get_func("webp")(fig)
+    assert data[:4] == b"RIFF"
+    assert data[8:12] == b"WEBP"
+
+
+def test_raster_dpi(fig: Figure, raster_options):
+    from PIL import Image
+
+    raster_options(dpi=50)
+    small = Image.open(io.BytesIO(get_func("png")(fig)))
+    raster_options(dpi=100)
+    large = Image.open(io.BytesIO(get_func("png")(fig)))
+    assert large.width > 1.9 * small.width
+
+
+def test_raster_max_size(fig: Figure, raster_options):
+    from PIL import Image
+
+    from nbstore.formatter import get_raster_dpi
+
+    raster_options(dpi=1000, max_size=200)
+    assert get_raster_dpi(fig) == 200 / max(fig.get_size_inches())
+    image = Image.open(io.BytesIO(get_func("png")(fig)))
+    assert max(image.size) <= 200
+
+
+def test_raster_optimize(fig: Figure, raster_options):
+    raster_options(optimize=True)
+    assert get_func("png")(fig).startswith(b"\x89PNG")
+    assert get_func("webp")(fig)[8:12] == b"WEBP"
+
+
+def test_set_formatter_png(fig: Figure):
+    from nbstore.formatter import matplotlib_figure_to_png, set_formatter
+
+    ip = InteractiveShell()
+    set_formatter("matplotlib", "png", ip)
+    formatter = ip.display_formatter.formatters["image/png"]  # type:ignore
+    assert (
+        formatter.lookup_by_type("matplotlib.figure.Figure") is matplotlib_figure_to_png
+    )
+
+
+def test_set_formatter_webp(fig: Figure):
+    from nbstore.formatter import set_formatter
+
+    ip = InteractiveShell()
+    set_formatter("matplotlib", "webp", ip)
+    data, _ = ip.display_formatter.format(fig)  # type:ignore
+    assert data["image/webp"][8:12] == b"WEBP"
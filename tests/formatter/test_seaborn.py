@@ -79,3 +79,35 @@ def test_set_formatter_svg():
     assert isinstance(formatter, SVGFormatter)
     func = formatter.lookup_by_type("seaborn._core.plot.Plot")
     assert func is seaborn_plot_to_svg
+
+
+def test_set_formatter_multiple(plot: Plot):
+    from nbstore.formatter import set_formatter
+
+    ip = InteractiveShell()
+    set_formatter("seaborn", ["pdf", "svg"], ip)
+    data, _ = ip.display_formatter.format(plot)  # type:ignore
+    assert data["application/pdf"].startswith(b"%PDF")
+    assert data["image/svg+xml"].startswith('<?xml version="1.0"')
+
+
+def test_get_plotter():
+    from nbstore.formatter import PLOTTERS, get_plotter
+
+    plot = so.Plot()
+    plotter = get_plotter(plot)
+    assert get_plotter(plot) is plotter
+    get_func("svg")(plot)
+    assert get_plotter(plot) is plotter
+    PLOTTERS.clear()
+    assert get_plotter(plot) is not plotter
+
+
+def test_set_formatter_clear_plotters():
+    from nbstore.formatter import PLOTTERS, set_formatter
+
+    ip = InteractiveShell()
+    set_formatter("seaborn", "svg", ip)
+    set_formatter("seaborn", "pdf", ip)
+    callbacks = ip.events.callbacks["post_execute"]
+    assert callbacks.count(PLOTTERS.clear) == 1
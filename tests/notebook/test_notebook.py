@@ -72,3 +72,19 @@ def test_equals():
     assert equals(nb1, nb2)
     nb2["cells"] = [nbformat.v4.new_code_cell("b")]
     assert not equals(nb1, nb2)
+
+
+def test_update_cells():
+    from nbstore.notebook import update_cells
+
+    nb = nbformat.v4.new_notebook()
+    a, b = nbformat.v4.new_code_cell("a"), nbformat.v4.new_code_cell("b")
+    nb["cells"] = [a, b]
+    other = nbformat.v4.new_notebook()
+    other["cells"] = [nbformat.v4.new_code_cell(x) for x in ["b", "c", "a"]]
+    other["metadata"]["language_info"] = {"name": "julia"}
+    update_cells(nb, other)
+    assert [cell["source"] for cell in nb["cells"]] == ["b", "c", "a"]
+    assert nb["cells"][0] is b
+    assert nb["cells"][2] is a
+    assert nb["metadata"]["language_info"] == {"name": "julia"}
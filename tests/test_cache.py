@@ -0,0 +1,64 @@
+def test_lru_cache():
+    from nbstore.cache import LRUCache
+
+    cache = LRUCache[str, int](maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert cache.info() == (1, 1, 2, 2)
+
+
+def test_lru_cache_resize():
+    from nbstore.cache import LRUCache
+
+    cache = LRUCache[str, int](maxsize=3)
+    for k, x in enumerate("abc"):
+        cache.set(x, k)
+    cache.resize(1)
+    assert len(cache) == 1
+    assert cache.get("c") == 2
+    assert cache.pop("c") == 2
+    assert cache.pop("c") is None
+
+
+def test_lru_cache_clear():
+    from nbstore.cache import LRUCache
+
+    cache = LRUCache[str, int]()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.clear()
+    assert cache.info() == (0, 0, 128, 0)
+
+
+def test_digest():
+    from nbstore.cache import digest
+
+    assert digest("a") == digest("a")
+    assert digest("a") != digest("b")
+    assert len(digest("a")) == 16
+
+
+def test_lru_cache_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    from nbstore.cache import LRUCache
+
+    cache = LRUCache[int, int](maxsize=8)
+
+    def run(n: int) -> None:
+        for k in range(2000):
+            cache.set(k % 16, n)
+            cache.get((k + n) % 16)
+            cache.pop((k + 1) % 16)
+
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(run, range(4)))
+
+    assert len(cache) <= 8
+    info = cache.info()
+    assert info.hits + info.misses == 8000
@@ -0,0 +1,135 @@
+import io
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from nbstore.convert import Converter, convert, get_key, is_available
+
+
+def _png(width: int = 40, height: int = 20) -> bytes:
+    with io.BytesIO() as fp:
+        Image.new("RGB", (width, height), "red").save(fp, format="PNG")
+        return fp.getvalue()
+
+
+def _size(data: bytes) -> tuple[int, int]:
+    with Image.open(io.BytesIO(data)) as image:
+        return image.size
+
+
+def test_is_available():
+    assert is_available("image/png")
+    assert not is_available("text/plain")
+
+
+def test_convert():
+    assert _size(convert(_png(), "image/png")) == (40, 20)
+
+
+def test_convert_width():
+    assert _size(convert(_png(), "image/png", 20)) == (20, 10)
+
+
+def test_convert_cache(tmp_path: Path):
+    data = _png()
+    png = convert(data, "image/png", 20, tmp_path)
+    path = tmp_path / f"{get_key(data, 'image/png', 20)}.png"
+    assert path.read_bytes() == png
+    path.write_bytes(b"cached")
+    assert convert(data, "image/png", 20, tmp_path) == b"cached"
+
+
+def test_convert_cache_error(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    def replace(self: Path, target: Path) -> Path:
+        raise OSError
+
+    monkeypatch.setattr(Path, "replace", replace)
+    with pytest.raises(OSError):  # noqa: PT011
+        convert(_png(), "image/png", 20, tmp_path)
+    assert not list(tmp_path.iterdir())
+
+
+def test_convert_error():
+    with pytest.raises(NotImplementedError, match="cannot convert 'text/plain'"):
+        convert("abc", "text/plain")
+
+
+def test_get_key():
+    data = _png()
+    assert get_key(data, "image/png", 10) != get_key(data, "image/png", 20)
+    assert get_key(data, "image/png", None) != get_key(data, "image/webp", None)
+
+
+def test_converter_submit_many(tmp_path: Path):
+    items = [("image/png", _png(40, 20)), ("image/png", _png(80, 20))]
+    with Converter(tmp_path, max_workers=2) as converter:
+        futures = converter.submit_many(items, width=20)
+        sizes = [_size(future.result()) for future in futures]
+    assert sizes == [(20, 10), (20, 5)]
+    assert len(list(tmp_path.glob("*.png"))) == 2
+
+
+def test_converter_submit_many_mime_content():
+    import base64
+
+    import nbformat
+
+    from nbstore.notebook import get_mime_content
+
+    nb = nbformat.v4.new_notebook()
+    cells = [nbformat.v4.new_code_cell(f"# #{k}\nfig") for k in "ab"]
+    for cell, width in zip(cells, [40, 80], strict=True):
+        data = {"image/png": base64.b64encode(_png(width, 20)).decode()}
+        cell["outputs"] = [nbformat.v4.new_output("display_data", data)]
+    nb["cells"] = cells
+    items = [get_mime_content(nb, k) for k in "ab"]
+    with Converter(max_workers=1) as converter:
+        futures = converter.submit_many(items, width=20)
+        sizes = [_size(future.result()) for future in futures]
+    assert sizes == [(20, 10), (20, 5)]
+
+
+def test_converter_cache(tmp_path: Path):
+    data = _png()
+    path = tmp_path / f"{get_key(data, 'image/png', None)}.png"
+    path.write_bytes(b"cached")
+    converter = Converter(tmp_path)
+    future = converter.submit(data, "image/png")
+    assert future.done()
+    assert future.result() == b"cached"
+    assert converter._executor is None  # noqa: SLF001
+
+
+def test_converter_in_flight():
+    data = _png()
+    with Converter(max_workers=1) as converter:
+        future = converter.submit(data, "image/png")
+        if not future.done():
+            assert converter.submit(data, "image/png") is future
+        assert _size(future.result()) == (40, 20)
+
+
+def test_converter_error():
+    with Converter() as converter, pytest.raises(NotImplementedError):
+        converter.submit("abc", "text/plain")
+
+
+SVG = """\
+<svg xmlns="http://www.w3.org/2000/svg" width="40" height="20">
+<rect width="40" height="20" fill="red"/>
+</svg>
+"""
+
+
+@pytest.mark.skipif(not is_available("image/svg+xml"), reason="no cairosvg")
+def test_convert_svg():
+    assert _size(convert(SVG, "image/svg+xml", 80)) == (80, 40)
+
+
+@pytest.mark.skipif(not is_available("application/pdf"), reason="no pypdfium2")
+def test_convert_pdf():
+    with io.BytesIO() as fp:
+        Image.new("RGB", (40, 20), "red").save(fp, format="PDF")
+        data = fp.getvalue()
+    assert _size(convert(data, "application/pdf", 80))[0] == 80
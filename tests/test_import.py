@@ -0,0 +1,41 @@
+import subprocess
+import sys
+
+import pytest
+
+HEAVY = ["IPython", "holoviews", "jsonschema", "matplotlib", "nbformat", "seaborn"]
+
+
+def imported_modules(module: str) -> list[str]:
+    code = f"import sys, {module}; print(*sys.modules, sep='\\n')"
+    args = [sys.executable, "-c", code]
+    result = subprocess.run(args, capture_output=True, text=True, check=True)
+    return result.stdout.splitlines()
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["nbstore", "nbstore.markdown", "nbstore.store", "nbstore.formatter"],
+)
+def test_import(module: str):
+    modules = imported_modules(module)
+    assert module in modules
+    assert not [name for name in modules if name.split(".")[0] in HEAVY]
+
+
+def test_getattr():
+    import nbstore
+    import nbstore.formatter
+    import nbstore.store
+
+    assert nbstore.Store is nbstore.store.Store
+    assert nbstore.read is nbstore.store.read
+    assert nbstore.set_formatter is nbstore.formatter.set_formatter
+    assert "Store" in dir(nbstore)
+
+
+def test_getattr_error():
+    import nbstore
+
+    with pytest.raises(AttributeError, match="has no attribute 'unknown'"):
+        _ = nbstore.unknown
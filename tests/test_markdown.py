@@ -31,6 +31,8 @@ from nbformat import NotebookNode
         ("a = b c = d", ["a=b", "c=d"]),
         ("a = b c =", ["a=b", "c", "="]),
         ("a='b c' d = 'e f'", ["a='b c'", "d='e f'"]),
+        (r"a\ b c", [r"a\ b", "c"]),
+        ('a "b"=c', ["a", '"b"', "=c"]),
     ],
 )
 def test_split(text, expected):
@@ -228,6 +230,22 @@ def test_image_code_eq():
     assert x.classes == ["b"]
 
 
+def test_parse_cached():
+    from nbstore.markdown import ATTRIBUTES, Image, parse
+
+    text = "![a](b.png){#fig .center width=100}"
+    x = next(parse(text))
+    assert isinstance(x, Image)
+    x.classes.append("x")
+    x.attributes["width"] = "1"
+    assert "#fig .center width=100" in ATTRIBUTES
+
+    y = next(parse(text))
+    assert isinstance(y, Image)
+    assert y.classes == [".center"]
+    assert y.attributes == {"width": "100"}
+
+
 SOURCE_LANG = """\
 
 ```python #_
@@ -380,6 +398,131 @@ def test_language_error():
         new_notebook("hello")
 
 
+def test_parse_document():
+    from nbstore.markdown import CodeBlock, Image, parse_document
+
+    document = parse_document(SOURCE_LANG_AFTER)
+    assert document.language == "julia"
+    assert [type(x) for _, _, x in document.spans] == [Image, CodeBlock, CodeBlock]
+    for start, end, elem in document.spans:
+        assert SOURCE_LANG_AFTER[start:end] == elem.text
+    assert parse_document(SOURCE_LANG_AFTER) == document
+
+
+def test_parse_document_copy():
+    from nbstore.markdown import get_language, new_notebook, parse_document
+
+    document = parse_document(SOURCE_LANG_AFTER)
+    code_block = document.get_code_block("plot-1")
+    assert code_block
+    code_block.source = "changed"
+    code_block.classes[0] = "python"
+    document.get_images("plot-1")[0].url = "a.py"
+    assert get_language(SOURCE_LANG_AFTER) == "julia"
+    assert new_notebook(SOURCE_LANG_AFTER)["cells"][0]["source"] == "# #plot-1\nplot(1)"
+    code_block = parse_document(SOURCE_LANG_AFTER).get_code_block("plot-1")
+    assert code_block
+    assert code_block.source == "plot(1)"
+    assert code_block.classes[0] == "julia"
+
+
+def test_document_index():
+    from nbstore.markdown import CodeBlock, Image, parse_document
+
+    document = parse_document(SOURCE_LANG_AFTER)
+    code_block = document.get_code_block("plot-1")
+    assert isinstance(code_block, CodeBlock)
+    assert code_block.source == "plot(1)"
+    assert document.get_code_block("x") is None
+    images = document.get_images("plot-1")
+    assert len(images) == 1
+    assert isinstance(images[0], Image)
+    assert [x.identifier for x in document.iter_code_blocks()] == ["_", "plot-1"]
+    assert [x.identifier for x in document.iter_images()] == ["plot-1"]
+    start, end = document.get_span(code_block)
+    assert SOURCE_LANG_AFTER[start:end] == code_block.text
+
+
+def test_document_get_span_error():
+    from nbstore.markdown import CodeBlock, parse_document
+
+    document = parse_document(SOURCE_LANG_AFTER)
+    with pytest.raises(ValueError, match="element not in document"):
+        document.get_span(CodeBlock("", "", [], {}))
+
+
+SPLICE = """\
+```python #a
+a = 1
+```
+
+  ![alt](a.ipynb){#a}
+
+```python #b
+b = 2
+```
+"""
+
+
+def test_document_splice():
+    from nbstore.markdown import parse_document
+
+    document = parse_document(SPLICE)
+    a, b = document.iter_code_blocks()
+    (image,) = document.iter_images()
+    edits = [(b, "B"), (image, "  ![](b.ipynb)"), (a, "A")]
+    text = document.splice(edits)
+    assert text == "A\n\n  ![](b.ipynb)\n\nB\n"
+
+
+def test_document_splice_empty():
+    from nbstore.markdown import parse_document
+
+    assert parse_document(SPLICE).splice([]) == SPLICE
+
+
+def test_document_splice_error():
+    from nbstore.markdown import parse_document
+
+    document = parse_document(SPLICE)
+    elem = next(document.iter_code_blocks())
+    with pytest.raises(ValueError, match="element replaced more than once"):
+        document.splice([(elem, "a"), (elem, "b")])
+
+
+def test_documents_bounded():
+    from nbstore.markdown import DOCUMENTS, get_language
+
+    maxsize = DOCUMENTS.maxsize
+    DOCUMENTS.clear()
+    DOCUMENTS.resize(4)
+    try:
+        for k in range(10):
+            assert get_language(f"{SOURCE_LANG}\n{k}\n") == "python"
+        assert get_language(f"{SOURCE_LANG}\n9\n") == "python"
+        assert DOCUMENTS.info() == (1, 10, 4, 4)
+    finally:
+        DOCUMENTS.resize(maxsize)
+
+
+def test_new_notebook_parse_once(monkeypatch: pytest.MonkeyPatch):
+    import nbstore.markdown
+    from nbstore.markdown import get_language, new_notebook
+
+    calls = []
+
+    def parse(text, *args, **kwargs):
+        calls.append(text)
+        return nbstore.markdown._lex(text, 0, len(text))
+
+    monkeypatch.setattr(nbstore.markdown, "parse", parse)
+    text = f"{SOURCE_LANG}\n<!-- parse once -->\n"
+    nb = new_notebook(text)
+    assert len(nb["cells"]) == 2
+    assert get_language(text) == "python"
+    assert calls == [text]
+
+
 SOURCE_INDENT_IMAGE = """\
 ![alt](.md){#id-0}
  ![alt](.md){#id-1}
@@ -456,3 +599,294 @@ def test_comment():
 
     text = "<!-- ![alt](a.py){#id} -->"
     assert next(parse(text)) == text
+
+
+SOURCE_UPDATE = """\
+# Title
+
+```python #a
+a = 1
+```
+
+Text with ![alt](.md){#a}.
+
+```python #b
+b = 2
+```
+
+```bash
+echo 3
+```
+"""
+
+
+@pytest.mark.parametrize(
+    ("old", "new"),
+    [
+        ("a = 1\n", "a = 10\nprint(a)\n"),
+        ("b = 2\n", ""),
+        ("echo 3", "echo 4"),
+        ("# Title", "# New title\n\nParagraph"),
+    ],
+)
+def test_update_notebook(old, new):
+    from nbstore.markdown import new_notebook, update_notebook
+    from nbstore.notebook import equals
+
+    nb = new_notebook(SOURCE_UPDATE)
+    cells = list(nb["cells"])
+    text = SOURCE_UPDATE.replace(old, new)
+    assert update_notebook(nb, SOURCE_UPDATE, text)
+    assert equals(nb, new_notebook(text))
+    for cell in nb["cells"]:
+        if any(cell["source"] == c["source"] for c in cells):
+            assert any(cell is c for c in cells)
+
+
+def test_update_notebook_cell():
+    from nbstore.markdown import new_notebook, update_notebook
+
+    nb = new_notebook(SOURCE_UPDATE)
+    a, b = nb["cells"]
+    text = SOURCE_UPDATE.replace("b = 2", "b = 3")
+    assert update_notebook(nb, SOURCE_UPDATE, text)
+    assert nb["cells"][0] is a
+    assert nb["cells"][1] is not b
+    assert nb["cells"][1]["source"] == "# #b\nb = 3"
+    text2 = text.replace("a = 1", "a = 2")
+    assert update_notebook(nb, text, text2)
+    assert nb["cells"][0]["source"] == "# #a\na = 2"
+
+
+def test_update_notebook_document():
+    from nbstore.markdown import new_notebook, parse_document, update_notebook
+
+    nb = new_notebook(SOURCE_UPDATE)
+    old = parse_document(SOURCE_UPDATE)
+    text = SOURCE_UPDATE.replace("b = 2", "b = 3")
+    assert update_notebook(nb, SOURCE_UPDATE, text)
+    document = parse_document(text)
+    assert document is not old
+    code_block = document.get_code_block("b")
+    assert code_block
+    assert code_block.source == "b = 3"
+    start, end = document.get_span(code_block)
+    assert text[start:end] == code_block.text
+    old_code_block = old.get_code_block("b")
+    assert old_code_block
+    assert old_code_block.source == "b = 2"
+
+
+def test_update_notebook_same():
+    from nbstore.markdown import new_notebook, update_notebook
+
+    nb = new_notebook(SOURCE_UPDATE)
+    assert update_notebook(nb, SOURCE_UPDATE, SOURCE_UPDATE)
+
+
+@pytest.mark.parametrize(
+    ("old", "new"),
+    [
+        ("a = 1\n", "a = 1\n```\n"),
+        ("b = 2\n", "b = 2\n<!--\n"),
+        ("python #b", "python #c"),
+        ("# Title", "# Title ![x](.md){#b}"),
+        ("Text with", "Text\nwith"),
+        ("```bash\n", ""),
+    ],
+)
+def test_update_notebook_structure(old, new):
+    from nbstore.markdown import new_notebook, update_notebook
+
+    nb = new_notebook(SOURCE_UPDATE)
+    text = SOURCE_UPDATE.replace(old, new)
+    assert not update_notebook(nb, SOURCE_UPDATE, text)
+
+
+@pytest.mark.parametrize(
+    ("old", "new", "expected"),
+    [
+        ("abc\ndef\nghi", "abc\ndxf\nghi", (4, 8)),
+        ("abc\ndef\nghi", "abc\nghi", (4, 8)),
+        ("abc\nghi", "abc\ndef\nghi", (4, 4)),
+        ("abc\ndef\nghi", "abc\ndefghi", (4, 11)),
+        ("abc", "abd", (0, 3)),
+        ("abc\n", "abc\nd", (4, 4)),
+    ],
+)
+def test_diff_lines(old, new, expected):
+    from nbstore.markdown import _diff_lines
+
+    assert _diff_lines(old, new) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        SOURCE,
+        SOURCE_LANG,
+        SOURCE_NOTEBOOK,
+        SOURCE_INDENT_IMAGE,
+        SOURCE_INDENT_CODE_BLOCK,
+        SOURCE_UPDATE,
+        "<!-- ```python\na\n``` -->\n```python\n<!-- a -->\n```\n",
+        "![a\n```\nb\n```\n](c){d}",
+        "```\n![a](b){c}\n```\n  ![a](b){c}  \n  ",
+        "a\n  <!-- b -->",
+        "````\na\n```\nb\n````\n",
+        "````\na\n```\n",
+        " ```\na\n```\n ```x\n",
+        "~~~\n```\n~~~~\n",
+        "![a](b){c}`}",
+        "![a](b){c}`} <!-- d -->",
+        "![a](b){c\n```\nd\n```\n}",
+        "<!-- a <!-- b --> c -->",
+    ],
+)
+def test_lex(text):
+    from nbstore.markdown import _parse_nested, parse
+
+    assert list(parse(text)) == list(_parse_nested(text))
+
+
+@pytest.mark.parametrize(("pos", "endpos"), [(0, 10), (5, None), (14, 40)])
+def test_lex_pos(pos, endpos):
+    from nbstore.markdown import _parse_nested, parse
+
+    x = list(parse(SOURCE, pos, endpos))
+    assert x == list(_parse_nested(SOURCE, pos, endpos))
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "".join(f"{' ' * k}```\nx\n" for k in range(200)),
+        f"{'`' * 20000}\n{'x' * 20000}\n```\n",
+        "![alt](url)\n" * 20000,
+        "![alt\n" * 20000,
+        "<!-- x\n" * 20000,
+    ],
+    ids=["fences", "long-fence", "images", "unclosed-images", "comments"],
+)
+def test_lex_linear(text):
+    from nbstore.markdown import parse
+
+    assert "".join(x if isinstance(x, str) else x.text for x in parse(text)) == text
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 4096])
+@pytest.mark.parametrize(
+    "text",
+    [
+        SOURCE,
+        SOURCE_LANG,
+        SOURCE_INDENT_IMAGE,
+        SOURCE_UPDATE,
+        "a\n\n```\n\nb\n\n```\n\n  ![a](b){c}\n\n",
+        "<!--\n\n```\n\n-->\n\nx\n\n<!-- a\n\nb",
+        "````\n\na\n\n```\n\nb\n\n````\n\n",
+        "```\n\na\n\n",
+    ],
+)
+def test_parse_stream(text, chunk_size):
+    import io
+
+    from nbstore.markdown import parse, parse_stream
+
+    assert list(parse_stream(io.StringIO(text), chunk_size)) == list(parse(text))
+
+
+def test_parse_stream_lazy():
+    import io
+
+    from nbstore.markdown import CodeBlock, parse_stream
+
+    fp = io.StringIO("```python #a\nprint(1)\n```\n\n" * 1000)
+    it = parse_stream(fp, 64)
+    assert isinstance(next(it), CodeBlock)
+    assert fp.tell() < 1000
+
+
+def test_new_notebook_from_stream():
+    import io
+
+    from nbstore.markdown import new_notebook, new_notebook_from_stream
+    from nbstore.notebook import equals
+
+    nb = new_notebook_from_stream(io.StringIO(SOURCE), 16)
+    expected = new_notebook(SOURCE)
+    assert equals(nb, expected)
+    assert nb["metadata"] == expected["metadata"]
+
+
+def test_lex_indented_comment():
+    from nbstore.markdown import parse
+
+    it = parse("a\n  <!-- b -->\nc")
+    assert next(it) == "a\n"
+    assert next(it) == "<!-- b -->"
+    with pytest.raises(NotImplementedError):
+        next(it)
+
+
+def test_update_text():
+    from nbstore.markdown import new_notebook, update_text
+
+    nb = new_notebook(SOURCE_UPDATE)
+    nb["cells"][0]["source"] = "# #a\na = 10\nprint(a)"
+    text = update_text(SOURCE_UPDATE, nb)
+    assert text == SOURCE_UPDATE.replace("a = 1\n", "a = 10\nprint(a)\n")
+
+
+def test_update_text_empty():
+    from nbstore.markdown import new_notebook, update_text
+
+    nb = new_notebook(SOURCE_UPDATE)
+    nb["cells"][1]["source"] = "# #b\n"
+    text = update_text(SOURCE_UPDATE, nb)
+    assert text == SOURCE_UPDATE.replace("b = 2\n", "")
+
+
+def test_update_text_unchanged():
+    from nbstore.markdown import new_notebook, update_text
+
+    nb = new_notebook(SOURCE_UPDATE)
+    assert update_text(SOURCE_UPDATE, nb) is SOURCE_UPDATE
+
+
+def test_update_text_indent():
+    from nbstore.markdown import new_notebook, update_text
+
+    text = "- item\n\n    ```python #a\n    a = 1\n\n    b = 2\n    ```\n"
+    nb = new_notebook(text)
+    nb["cells"][0]["source"] = "# #a\na = 3\n\nb = 4"
+    assert update_text(text, nb) == text.replace("1", "3").replace("2", "4")
+
+
+def test_update_text_document():
+    from nbstore.markdown import Document, new_notebook, parse_document, update_text
+
+    nb = new_notebook(SOURCE_UPDATE)
+    nb["cells"][0]["source"] = "# #a\na = 10\nprint(a)"
+    text = update_text(SOURCE_UPDATE, nb)
+    document = parse_document(text)
+    assert document.spans == Document.from_text(text).spans
+    code_block = document.get_code_block("a")
+    assert code_block
+    assert code_block.source == "a = 10\nprint(a)"
+
+
+@pytest.mark.parametrize(
+    ("index", "source"),
+    [(0, "# #c\na = 1"), (1, "# #b\n```\nb = 2"), (2, None)],
+)
+def test_update_text_error(index, source):
+    from nbstore.markdown import new_notebook, update_text
+
+    nb = new_notebook(SOURCE_UPDATE)
+    if source is None:
+        nb["cells"].append(nbformat.v4.new_code_cell("# #c\nc = 3"))
+    else:
+        nb["cells"][index]["source"] = source
+    with pytest.raises(ValueError, match="cell|code block"):
+        update_text(SOURCE_UPDATE, nb)
@@ -166,3 +166,85 @@ def test_cell_5(nb: NotebookNode):
     from nbstore.notebook import get_source
 
     assert get_source(nb, "plot-5") == "\nplot(5)"
+
+
+def test_update_text():
+    from nbstore.python import new_notebook, update_text
+
+    nb = new_notebook(SOURCE_NOTEBOOK)
+    nb["cells"][1]["source"] = "# %% #plot-1\nplot(10)"
+    nb["cells"][2]["source"] = "# %% #plot-2\nplot(20)\nplot(21)"
+    text = update_text(SOURCE_NOTEBOOK, nb)
+    expected = SOURCE_NOTEBOOK.replace("plot(1)", "plot(10)").replace(
+        "    # %% #plot-2\n\n    plot(2)",
+        "    # %% #plot-2\n    plot(20)\n    plot(21)",
+    )
+    assert text == expected
+    cells = [cell["source"] for cell in new_notebook(text)["cells"]]
+    assert cells == [cell["source"] for cell in nb["cells"]]
+
+
+def test_update_text_unchanged():
+    from nbstore.python import new_notebook, update_text
+
+    nb = new_notebook(SOURCE_NOTEBOOK)
+    assert update_text(SOURCE_NOTEBOOK, nb) == SOURCE_NOTEBOOK
+
+
+def test_update_text_error():
+    from nbstore.python import new_notebook, update_text
+
+    nb = new_notebook(SOURCE_NOTEBOOK)
+    nb["cells"].pop()
+    with pytest.raises(ValueError, match="cells do not match"):
+        update_text(SOURCE_NOTEBOOK, nb)
+
+
+SOURCE_BLANK = """\
+x = 1
+if __name__ == '__main__':
+    main()
+    \n    other()
+"""
+
+
+def test_update_text_blank_line():
+    from nbstore.python import new_notebook, update_text
+
+    nb = new_notebook(SOURCE_BLANK)
+    assert nb["cells"][1]["source"] == "main()\n\nother()"
+    assert update_text(SOURCE_BLANK, nb) == SOURCE_BLANK
+    nb["cells"][1]["source"] = "main()\n\nother(2)"
+    text = update_text(SOURCE_BLANK, nb)
+    assert text == SOURCE_BLANK.replace("    \n    other()", "\n    other(2)")
+    assert new_notebook(text)["cells"][1]["source"] == "main()\n\nother(2)"
+
+
+@pytest.mark.parametrize(
+    ("index", "source"),
+    [
+        (1, "# %% #plot-x\nplot(1)"),
+        (1, "plot(1)"),
+        (1, "# %% #plot-1\nplot(1)\n# %% #plot-x\nplot(2)"),
+        (0, "# %% #plot-x\ndef plot(x: int): ..."),
+        (3, '# %% #plot-3\nif __name__ == "__main__":\n    plot(3)'),
+    ],
+)
+def test_update_text_marker(index, source):
+    from nbstore.python import new_notebook, update_text
+
+    nb = new_notebook(SOURCE_NOTEBOOK)
+    nb["cells"][index]["source"] = source
+    with pytest.raises(ValueError, match="cell"):
+        update_text(SOURCE_NOTEBOOK, nb)
+
+
+def test_update_text_empty_source():
+    from nbstore.python import new_notebook, update_text
+
+    text = "\n\n# %% #a\na = 1\n"
+    nb = new_notebook(text)
+    assert nb["cells"][0]["source"] == ""
+    nb["cells"][0]["source"] = "b = 2"
+    with pytest.raises(ValueError, match="without source"):
+        update_text(text, nb)
@@ -1,3 +1,8 @@
+import base64
+import gc
+import os
+import threading
+import weakref
 from pathlib import Path
 
 import nbformat
@@ -73,3 +78,478 @@ def test_read_markdown(tmp_path: Path):
     nb = read(path)
     assert get_language(nb) == "julia"
     assert get_source(nb, "id1") == "println(1)"
+
+
+def test_read_markdown_stream(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import nbstore.store
+    from nbstore.notebook import get_language, get_source
+    from nbstore.store import read
+
+    monkeypatch.setattr(nbstore.store, "STREAM_SIZE", 0)
+    path = tmp_path / "test.md"
+    path.write_text("```julia #id1\nprintln(1)\n```\n\n```julia #id2\n\n```\n")
+    nb = read(path)
+    assert get_language(nb) == "julia"
+    assert get_source(nb, "id1") == "println(1)"
+    assert get_source(nb, "id2") == ""
+
+
+def _write(path: Path, text: str, st_mtime: float) -> None:
+    path.write_text(text)
+    os.utime(path, (st_mtime, st_mtime))
+
+
+def test_read_incremental_markdown(tmp_path: Path):
+    from nbstore.notebook import get_source
+
+    path = tmp_path / "a.md"
+    text = "```python #a\na = 1\n```\n\n```python #b\nb = 2\n```\n"
+    _write(path, text, 1)
+    store = Store(tmp_path, incremental=True)
+    nb = store.read("a.md")
+    a, b = nb["cells"]
+    _write(path, text.replace("b = 2", "b = 3"), 2)
+    assert store.read("a.md") is nb
+    assert nb["cells"][0] is a
+    assert nb["cells"][1] is not b
+    assert get_source(nb, "b") == "b = 3"
+
+
+def test_read_incremental_markdown_structure(tmp_path: Path):
+    from nbstore.notebook import get_source
+
+    path = tmp_path / "a.md"
+    text = "```python #a\na = 1\n```\n\n```python #b\nb = 2\n```\n"
+    _write(path, text, 1)
+    store = Store(tmp_path, incremental=True)
+    nb = store.read("a.md")
+    a = nb["cells"][0]
+    _write(path, text.replace("#b", "#c"), 2)
+    assert store.read("a.md") is nb
+    assert nb["cells"][0] is a
+    assert get_source(nb, "c") == "b = 2"
+
+
+def test_read_incremental_python(tmp_path: Path):
+    from nbstore.notebook import get_source
+
+    path = tmp_path / "a.py"
+    _write(path, "# %% #a\na = 1\n# %% #b\nb = 2\n", 1)
+    store = Store(tmp_path, incremental=True)
+    nb = store.read("a.py")
+    a = nb["cells"][0]
+    _write(path, "# %% #a\na = 1\n# %% #b\nb = 3\n", 2)
+    assert store.read("a.py") is nb
+    assert nb["cells"][0] is a
+    assert get_source(nb, "b") == "b = 3"
+
+
+def test_read_incremental_notebook(tmp_path: Path):
+    nb = nbformat.v4.new_notebook()
+    nbformat.write(nb, tmp_path / "a.ipynb")
+    store = Store(tmp_path, incremental=True)
+    assert store.read("a.ipynb")["cells"] == []
+    assert not store.texts
+
+
+def _binary_notebook() -> nbformat.NotebookNode:
+    nb = nbformat.v4.new_notebook()
+    cell = nbformat.v4.new_code_cell("# #fig\nfig")
+    png = base64.b64encode(b"png" * 100).decode()
+    pdf = base64.b64encode(b"pdf").decode()
+    data = {"image/png": png, "application/pdf": pdf, "text/plain": "fig"}
+    cell["outputs"] = [nbformat.v4.new_output("display_data", data)]
+    nb["cells"] = [cell]
+    return nb
+
+
+def test_write_sidecar(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import nbstore.store
+    from nbstore.notebook import SIDECAR_PREFIX, get_data, get_mime_content
+
+    monkeypatch.setattr(nbstore.store, "SIDECAR_SIZE", 100)
+    store = Store(tmp_path, sidecar=".outputs")
+    nb = _binary_notebook()
+    store.write(str(tmp_path / "a.ipynb"), nb)
+    paths = list(tmp_path.joinpath(".outputs").iterdir())
+    assert len(paths) == 1
+    assert paths[0].read_bytes() == b"png" * 100
+    assert paths[0].suffix == ".png"
+
+    data = get_data(nbformat.read(tmp_path / "a.ipynb", as_version=4), "fig")
+    assert data["image/png"] == f"{SIDECAR_PREFIX}.outputs/{paths[0].name}"
+    assert data["application/pdf"] == base64.b64encode(b"pdf").decode()
+    assert get_data(nb, "fig") == get_data(_binary_notebook(), "fig")
+    assert store.read("a.ipynb") is nb
+
+    nb = Store(tmp_path, sidecar=".outputs").read("a.ipynb")
+    assert get_data(nb, "fig")["image/png"] == f"{SIDECAR_PREFIX}{paths[0]}"
+    assert get_mime_content(nb, "fig") == ("application/pdf", b"pdf")
+    del get_data(nb, "fig")["application/pdf"]
+    assert get_mime_content(nb, "fig") == ("image/png", b"png" * 100)
+
+
+def test_write_sidecar_rewrite(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import nbstore.store
+    from nbstore.notebook import SIDECAR_PREFIX, get_data
+
+    monkeypatch.setattr(nbstore.store, "SIDECAR_SIZE", 0)
+    store = Store(tmp_path, sidecar=".outputs")
+    store.write(str(tmp_path / "a.ipynb"), _binary_notebook())
+    nb = store.read("a.ipynb")
+    store.write("a.ipynb", nb)
+    assert len(list(tmp_path.joinpath(".outputs").iterdir())) == 2
+    nb = nbformat.read(tmp_path / "a.ipynb", as_version=4)
+    data = get_data(nb, "fig")
+    name = data["image/png"].removeprefix(SIDECAR_PREFIX)
+    assert name.startswith(".outputs/")
+    assert (tmp_path / name).exists()
+
+
+def test_read_sidecar_disabled(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import nbstore.store
+    from nbstore.notebook import SIDECAR_PREFIX, get_data, get_mime_content
+
+    monkeypatch.setattr(nbstore.store, "SIDECAR_SIZE", 0)
+    nb = _binary_notebook()
+    del get_data(nb, "fig")["application/pdf"]
+    Store(tmp_path, sidecar=".outputs").write(str(tmp_path / "a.ipynb"), nb)
+    text = (tmp_path / "a.ipynb").read_text()
+
+    monkeypatch.chdir(tmp_path.parent)
+    store = Store(tmp_path)
+    nb = store.read("a.ipynb")
+    assert get_data(nb, "fig")["image/png"].startswith(f"{SIDECAR_PREFIX}/")
+    assert get_mime_content(nb, "fig") == ("image/png", b"png" * 100)
+    store.write("a.ipynb", nb)
+    assert (tmp_path / "a.ipynb").read_text() == text
+    assert get_data(nb, "fig")["image/png"].startswith(f"{SIDECAR_PREFIX}/")
+
+
+def test_read_sidecar_function(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import nbstore
+    import nbstore.store
+    from nbstore.notebook import get_data, get_mime_content
+
+    monkeypatch.setattr(nbstore.store, "SIDECAR_SIZE", 0)
+    nb = _binary_notebook()
+    del get_data(nb, "fig")["application/pdf"]
+    Store(tmp_path, sidecar=".out").write(str(tmp_path / "a.ipynb"), nb)
+    monkeypatch.chdir(tmp_path.parent)
+    nb = nbstore.read(tmp_path / "a.ipynb")
+    assert get_mime_content(nb, "fig") == ("image/png", b"png" * 100)
+
+
+def test_write_sidecar_error(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import nbstore.store
+
+    def replace(self: Path, target: Path) -> Path:
+        raise OSError
+
+    monkeypatch.setattr(nbstore.store, "SIDECAR_SIZE", 0)
+    monkeypatch.setattr(Path, "replace", replace)
+    store = Store(tmp_path, sidecar=".outputs")
+    with pytest.raises(OSError):  # noqa: PT011
+        store.write(str(tmp_path / "a.ipynb"), _binary_notebook())
+    assert not list(tmp_path.joinpath(".outputs").iterdir())
+
+
+def test_read_intern(tmp_path: Path):
+    from nbstore.notebook import get_data, get_mime_content
+
+    nbformat.write(_binary_notebook(), tmp_path / "a.ipynb")
+    nbformat.write(_binary_notebook(), tmp_path / "b.ipynb")
+    store = Store(tmp_path, intern=True)
+    a = get_data(store.read("a.ipynb"), "fig")
+    b = get_data(store.read("b.ipynb"), "fig")
+    for mime in a:
+        assert a[mime] is b[mime]
+    assert len(store.outputs) == 3
+    assert store.stats.shared == 3
+    assert store.stats.saved == sum(len(text) for text in a.values())
+    assert get_mime_content(store.nodes[tmp_path / "b.ipynb"], "fig")[1] == b"pdf"
+
+
+def test_read_intern_reread(tmp_path: Path):
+    from nbstore.notebook import get_data
+
+    path = tmp_path / "a.ipynb"
+    nbformat.write(_binary_notebook(), path)
+    store = Store(tmp_path, intern=True)
+    store.read("a.ipynb")
+    assert len(store.outputs) == 3
+
+    for k in range(1, 4):
+        nb = _binary_notebook()
+        get_data(nb, "fig")["text/plain"] = f"fig{k}"
+        nbformat.write(nb, path)
+        os.utime(path, (k, k))
+        store.read("a.ipynb")
+        assert len(store.outputs) == 3
+        assert "fig" not in store.outputs.values()
+        assert store.stats.shared == 0
+        assert store.stats.saved == 0
+
+
+def test_read_intern_release(tmp_path: Path):
+    from nbstore.notebook import get_data
+
+    nbformat.write(_binary_notebook(), tmp_path / "a.ipynb")
+    nbformat.write(_binary_notebook(), tmp_path / "b.ipynb")
+    store = Store(tmp_path, intern=True)
+    store.read("a.ipynb")
+    store.read("b.ipynb")
+
+    nb = _binary_notebook()
+    get_data(nb, "fig")["text/plain"] = "other"
+    nbformat.write(nb, tmp_path / "b.ipynb")
+    os.utime(tmp_path / "b.ipynb", (1, 1))
+    store.read("b.ipynb")
+    assert len(store.outputs) == 4
+    assert store.stats.shared == 2
+    assert "fig" in store.outputs.values()
+
+
+def test_read_intern_disabled(tmp_path: Path):
+    from nbstore.notebook import get_data
+
+    nbformat.write(_binary_notebook(), tmp_path / "a.ipynb")
+    nbformat.write(_binary_notebook(), tmp_path / "b.ipynb")
+    store = Store(tmp_path)
+    a = get_data(store.read("a.ipynb"), "fig")
+    b = get_data(store.read("b.ipynb"), "fig")
+    assert a["image/png"] is not b["image/png"]
+    assert not store.outputs
+
+
+def test_write_cache(tmp_path: Path):
+    nb = nbformat.v4.new_notebook()
+    store = Store(tmp_path)
+    store.write(str(tmp_path / "a.ipynb"), nb)
+    assert store.read("a.ipynb") is nb
+    assert nbformat.read(tmp_path / "a.ipynb", as_version=4) == nb
+    assert [p.name for p in tmp_path.iterdir()] == ["a.ipynb"]
+
+
+def test_write_unchanged(tmp_path: Path):
+    path = tmp_path / "a.ipynb"
+    store = Store(tmp_path)
+    store.write(str(path), nbformat.v4.new_notebook())
+    os.utime(path, (1, 1))
+    nb = store.read("a.ipynb")
+    store.write("a.ipynb", nb)
+    assert path.stat().st_mtime == 1
+    nb["cells"].append(nbformat.v4.new_code_cell("# #test\n123"))
+    store.write("a.ipynb", nb)
+    assert path.stat().st_mtime != 1
+
+
+def test_write_mode(tmp_path: Path):
+    path = tmp_path / "a.ipynb"
+    nbformat.write(nbformat.v4.new_notebook(), path)
+    path.chmod(0o600)
+    nb = nbformat.v4.new_notebook()
+    nb["cells"].append(nbformat.v4.new_code_cell("1"))
+    Store(tmp_path).write("a.ipynb", nb)
+    assert path.stat().st_mode & 0o777 == 0o600
+
+
+def test_write_atomic(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    path = tmp_path / "a.ipynb"
+    nbformat.write(nbformat.v4.new_notebook(), path)
+    text = path.read_text()
+
+    def fsync(fd: int) -> None:
+        raise OSError
+
+    monkeypatch.setattr(os, "fsync", fsync)
+    nb = nbformat.v4.new_notebook()
+    nb["cells"].append(nbformat.v4.new_code_cell("1"))
+    with pytest.raises(OSError):  # noqa: PT011
+        Store(tmp_path).write("a.ipynb", nb)
+    assert path.read_text() == text
+    assert [p.name for p in tmp_path.iterdir()] == ["a.ipynb"]
+
+
+def test_write_bytes(tmp_path: Path):
+    from nbstore.store import write_bytes
+
+    path = tmp_path / "a.png"
+    write_bytes(path, b"png")
+    assert path.read_bytes() == b"png"
+    assert path.stat().st_mode & 0o777 == 0o644
+    assert [p.name for p in tmp_path.iterdir()] == ["a.png"]
+
+
+def test_write_not_implemented(tmp_path: Path):
+    tmp_path.joinpath("a.txt").write_text("")
+    with pytest.raises(NotImplementedError):
+        Store(tmp_path).write("a.txt", nbformat.v4.new_notebook())
+
+
+def test_write_delay(tmp_path: Path):
+    from nbstore.notebook import get_source
+
+    path = tmp_path / "a.ipynb"
+    nbformat.write(nbformat.v4.new_notebook(), path)
+    text = path.read_text()
+    store = Store(tmp_path, delay=60)
+    nb = store.read("a.ipynb")
+    for k in range(3):
+        nb["cells"].append(nbformat.v4.new_code_cell(f"# #{k}\n{k}"))
+        store.write("a.ipynb", nb)
+    assert path.read_text() == text
+    assert list(store.dirty) == [path]
+    assert store.read("a.ipynb") is nb
+    store.flush()
+    assert not store.dirty
+    assert get_source(nbformat.read(path, as_version=4), "2") == "2"
+    assert store.read("a.ipynb") is nb
+
+
+def test_write_delay_background(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import nbstore.store
+
+    paths = []
+    written = threading.Event()
+
+    def write_text(path: Path, text: str) -> bool:
+        path.write_text(text)
+        paths.append(path)
+        written.set()
+        return True
+
+    monkeypatch.setattr(nbstore.store, "write_text", write_text)
+    path = tmp_path / "a.ipynb"
+    with Store(tmp_path, delay=0.1) as store:
+        nb = nbformat.v4.new_notebook()
+        for k in range(5):
+            nb["cells"].append(nbformat.v4.new_code_cell(str(k)))
+            store.write(str(path), nb)
+        assert written.wait(10)
+    assert paths == [path]
+    assert not store.dirty
+    assert len(nbformat.read(path, as_version=4)["cells"]) == 5
+
+
+def test_write_delay_close(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import nbstore.store
+
+    paths = []
+    write = nbstore.store.write_text
+
+    def write_text(path: Path, text: str) -> bool:
+        paths.append(path)
+        return write(path, text)
+
+    monkeypatch.setattr(nbstore.store, "write_text", write_text)
+    store = Store(tmp_path, delay=60)
+    nb = nbformat.v4.new_notebook()
+    for _ in range(3):
+        store.write(str(tmp_path / "a.ipynb"), nb)
+    thread = store._thread  # noqa: SLF001
+    assert thread
+    store.close()
+    assert paths == [tmp_path / "a.ipynb"]
+    assert not thread.is_alive()
+    assert store._thread is None  # noqa: SLF001
+
+    ref = weakref.ref(store)
+    del store
+    gc.collect()
+    assert ref() is None
+
+
+def test_write_delay_error(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import nbstore.store
+
+    def write_text(path: Path, text: str) -> bool:
+        raise OSError
+
+    monkeypatch.setattr(nbstore.store, "write_text", write_text)
+    store = Store(tmp_path, delay=60)
+    store.write(str(tmp_path / "a.ipynb"), nbformat.v4.new_notebook())
+    with pytest.raises(OSError):  # noqa: PT011
+        store.flush()
+    monkeypatch.undo()
+    store.close()
+
+
+def test_write_delay_retry(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import nbstore.store
+
+    path = tmp_path / "a.ipynb"
+    errors = [OSError()]
+    write = nbstore.store.write_text
+
+    def write_text(path: Path, text: str) -> bool:
+        if errors:
+            raise errors.pop()
+        return write(path, text)
+
+    monkeypatch.setattr(nbstore.store, "write_text", write_text)
+    store = Store(tmp_path, delay=60)
+    nb = nbformat.v4.new_notebook()
+    store.write(str(path), nb)
+    with pytest.raises(OSError):  # noqa: PT011
+        store.flush()
+    assert store.dirty == {path: nb}
+    assert not path.exists()
+    store.close()
+    assert not store.dirty
+    assert nbformat.read(path, as_version=4) == nb
+
+
+def test_write_delay_newer(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import nbstore.store
+
+    path = tmp_path / "a.ipynb"
+    nbformat.write(nbformat.v4.new_notebook(), path)
+    store = Store(tmp_path, delay=60)
+    nb = nbformat.v4.new_notebook()
+    newer = nbformat.v4.new_notebook()
+    newer["cells"].append(nbformat.v4.new_code_cell("1"))
+    write = nbstore.store.write_text
+
+    def write_text(path: Path, text: str) -> bool:
+        if store.dirty[path] is nb:
+            store.write(str(path), newer)
+        return write(path, text)
+
+    monkeypatch.setattr(nbstore.store, "write_text", write_text)
+    store.write(str(path), nb)
+    store.flush()
+    assert store.dirty == {path: newer}
+    assert store.nodes[path] is newer
+    assert store.read("a.ipynb") is newer
+    store.close()
+    assert not store.dirty
+    assert nbformat.read(path, as_version=4) == newer
+
+
+def test_write_markdown(tmp_path: Path):
+    from nbstore.notebook import get_source
+
+    path = tmp_path / "a.md"
+    text = "# A\n\n```python #a\na = 1\n```\n\n```python #b\nb = 2\n```\n"
+    path.write_text(text)
+    store = Store(tmp_path, incremental=True)
+    nb = store.read("a.md")
+    nb["cells"][1]["source"] = "# #b\nb = 3"
+    store.write("a.md", nb)
+    assert path.read_text() == text.replace("b = 2", "b = 3")
+    assert store.texts[path] == path.read_text()
+    assert store.read("a.md") is nb
+    assert get_source(Store(tmp_path).read("a.md"), "b") == "b = 3"
+
+
+def test_write_python(tmp_path: Path):
+    path = tmp_path / "a.py"
+    text = "import a\n\n# %% #a\na = 1\n# %% #b\nb = 2\n"
+    path.write_text(text)
+    store = Store(tmp_path)
+    nb = store.read("a.py")
+    nb["cells"][1]["source"] = "# %% #a\na = 10"
+    store.write("a.py", nb)
+    assert path.read_text() == text.replace("a = 1", "a = 10")
+    assert store.read("a.py") is nb